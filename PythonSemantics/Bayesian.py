@@ -1,6 +1,9 @@
 import functools as tools
+import itertools
+from array import array
 
 from PythonSemantics import Semantics
+from PythonSemantics import SemanticsUtils
 
 
 # A representation of the Bayesian Network governing
@@ -11,6 +14,7 @@ class BayesianNetwork:
         self.values = values  # dictionary: Semantic.Sentence.symbol : value
                               # or: Semantic.Sentence.symbol : ConditionalProbability
         self.validate()
+        self.compiled_network = None
 
     def validate(self):
         for _, item in self.values.items():  # Item can be ConditionalProbability object or absolute value
@@ -32,11 +36,202 @@ class BayesianNetwork:
         return rv_probability if not sentence.negation else (1 - rv_probability)
 
     def p_world(self, random_variables):
-        if not all([rv.symbol in self.values for rv in random_variables]):
+        return self.compile().p_world(random_variables)
+
+    # Returns the probabilities of the given worlds
+    def p_worlds(self, worlds):
+        return self.compile().p_worlds(worlds)
+
+    # Returns the array form of the network (compiled once)
+    def compile(self):
+        if self.compiled_network is None:
+            self.compiled_network = CompiledBayesianNetwork(self)
+        return self.compiled_network
+
+    # Returns the symbols of the random variables the given random variable is conditioned on
+    def parents(self, symbol):
+        item = self.values[symbol]
+        return [rv.symbol for rv in item.conditional_variables] if isinstance(item, ConditionalProbability) else []
+
+    # Returns the given symbols together with the symbols of all their ancestors
+    def ancestral_closure(self, symbols):
+        closure = set(symbols)
+        to_visit = list(closure)
+        while len(to_visit) > 0:
+            for parent in self.parents(to_visit.pop()):
+                if parent not in closure:
+                    closure.add(parent)
+                    to_visit.append(parent)
+
+        return closure
+
+    # Returns the given symbols, together with their ancestors, ordered so that every random variable follows its parents
+    def topological_order(self, symbols):
+        order = []
+        visited = set()
+
+        def visit(symbol):
+            if symbol in visited:
+                return
+            visited.add(symbol)
+            for parent in self.parents(symbol):
+                visit(parent)
+            order.append(symbol)
+
+        for symbol in sorted(symbols):
+            visit(symbol)
+
+        return order
+
+    # Samples a world over the topologically ordered symbols (ancestral sampling: each random variable is drawn
+    # given the values already drawn for its parents), using the given random.Random generator
+    def sample_world(self, generator, order):
+        compiled = self.compile()
+        values = {}
+        world = []
+        for symbol in order:
+            position = compiled.positions[symbol]
+            bits = 0
+            for j, parent in enumerate(compiled.parents[position]):
+                if values[parent]:
+                    bits |= 1 << j
+            values[symbol] = generator.random() < compiled.tables[position][bits]
+            world.append(Semantics.Sentence(symbol, random_variable=True, negation=not values[symbol]))
+
+        return world
+
+    # Returns the marginal probability of the sentence, summing out its ancestors
+    # (a world over an ancestrally closed set of random variables needs no other variables)
+    def marginal(self, sentence):
+        ancestors = sorted(self.ancestral_closure([sentence.symbol]) - {sentence.symbol})
+        probability = 0.0
+        for values in itertools.product([True, False], repeat=len(ancestors)):
+            world = [Semantics.Sentence(symbol, random_variable=True, negation=not value)
+                     for symbol, value in zip(ancestors, values)]
+            probability += self.p_world(world + [sentence])
+
+        return probability
+
+
+# Array form of a Bayesian network: random variables are numbered in topological order and each has
+# a conditional probability table indexed by the bits of its parents (bit j set when parent j holds)
+class CompiledBayesianNetwork:
+
+    def __init__(self, network):
+        for symbol in network.values:
+            if not all([parent in network.values for parent in network.parents(symbol)]):
+                raise InvalidRandomVariableException(symbol + " is conditioned on a variable outside the network")
+
+        self.symbols = network.topological_order(network.values.keys())
+        self.positions = dict([(symbol, position) for position, symbol in enumerate(self.symbols)])
+        self.parents = []  # Parent symbols of each random variable, sorted as in the probability keys
+        self.tables = []  # P(random variable | parent bits)
+
+        for symbol in self.symbols:
+            parents = sorted(network.parents(symbol))
+            self.parents.append(parents)
+            self.tables.append(array('d', [self.table_entry(network.values[symbol], parents, bits)
+                                           for bits in range(2 ** len(parents))]))
+
+    @staticmethod
+    def table_entry(item, parents, bits):
+        if not isinstance(item, ConditionalProbability):
+            return item
+
+        key = ''.join([parent if bits >> j & 1 else '~' + parent for j, parent in enumerate(parents)])
+        if key not in item.conditional_probabilities:
+            raise InvalidConditionalProbabilityException("Conditional probability missing for " + key)
+        return item.conditional_probabilities[key]
+
+    def p_world(self, random_variables):
+        return self.p_worlds([random_variables])[0]
+
+    # Returns the probabilities of the given worlds. Consecutive worlds over the
+    # same random variables (as generated by generate_worlds) share one lookup plan
+    def p_worlds(self, worlds):
+        probabilities = []
+        layout = None
+        plan = None
+
+        for world in worlds:
+            symbols = [rv.symbol for rv in world]
+            if symbols != layout:
+                layout = symbols
+                plan = self.lookup_plan(symbols)
+
+            probability = 1.0
+            for rv, (table, parents) in zip(world, plan):
+                bits = 0
+                for j, parent in enumerate(parents):
+                    if not world[parent].negation:
+                        bits |= 1 << j
+                rv_probability = table[bits]
+                probability *= rv_probability if not rv.negation else (1 - rv_probability)
+            probabilities.append(probability)
+
+        return probabilities
+
+    # Returns the probabilities of all the worlds over the topologically ordered symbols, indexed as in
+    # world_from_index. Each random variable doubles the table of the worlds over the ones before it
+    def world_probabilities(self, symbols):
+        probabilities = array('d', [1.0])
+        for index, symbol in enumerate(symbols):
+            position = self.positions[symbol]
+            if not all([parent in symbols[:index] for parent in self.parents[position]]):
+                raise InvalidConditionalProbabilityException(
+                    "Probability calculation requires all conditional random variables")
+
+            table = self.tables[position]
+            shifts = [index - 1 - symbols.index(parent) for parent in self.parents[position]]
+            extended = array('d', [0.0]) * (2 * len(probabilities))
+            for world, probability in enumerate(probabilities):
+                bits = 0
+                for j, shift in enumerate(shifts):
+                    if not world >> shift & 1:
+                        bits |= 1 << j
+                rv_probability = table[bits]
+                extended[2 * world] = probability * rv_probability
+                extended[2 * world + 1] = probability * (1 - rv_probability)
+            probabilities = extended
+
+        return probabilities
+
+    # Returns, for each random variable of a world, its table and the world positions of its parents
+    def lookup_plan(self, symbols):
+        if not all([symbol in self.positions for symbol in symbols]):
             raise InvalidRandomVariableWorldException("This is not a valid world in this Bayesian network")
 
-        return tools.reduce(lambda x, y: x*y,
-                            [self.p(sentence, conditional_variables=random_variables) for sentence in random_variables])
+        world_positions = dict([(symbol, index) for index, symbol in enumerate(symbols)])
+        plan = []
+        for symbol in symbols:
+            position = self.positions[symbol]
+            if not all([parent in world_positions for parent in self.parents[position]]):
+                raise InvalidConditionalProbabilityException(
+                    "Probability calculation requires all conditional random variables")
+            plan.append((self.tables[position], [world_positions[parent] for parent in self.parents[position]]))
+
+        return plan
+
+
+# The probabilities of all the worlds over an ancestrally closed set of random variables, computed in one pass.
+# World i is the bit pattern of i over the random variables in topological order (the first random variable
+# is the most significant bit, a set bit meaning a negation), as in SemanticsUtils.world_from_index
+class WorldTable:
+
+    def __init__(self, network, symbols):
+        self.symbols = network.topological_order(symbols) if len(symbols) > 0 else []
+        self.random_variables = [Semantics.Sentence(symbol, random_variable=True) for symbol in self.symbols]
+        self.probabilities = network.compile().world_probabilities(self.symbols) \
+            if len(symbols) > 0 else array('d', [1.0])
+
+    def __len__(self):
+        return len(self.probabilities)
+
+    def world(self, index):
+        return SemanticsUtils.world_from_index(self.random_variables, index)
+
+    def p(self, index):
+        return self.probabilities[index]
 
 
 # Encapsulates a random variable's conditional probability
@@ -10,9 +10,13 @@ g = Semantics.Sentence('g')
 h = Semantics.Sentence('h')
 i = Semantics.Sentence('i')
 j = Semantics.Sentence('j')
+k = Semantics.Sentence('k')
 
 s = Semantics.Sentence('s', random_variable=True)
 t = Semantics.Sentence('t', random_variable=True)
+u = Semantics.Sentence('u', random_variable=True)
+v = Semantics.Sentence('v', random_variable=True)
+w = Semantics.Sentence('w', random_variable=True)
 
 _a = Semantics.Sentence('_a')
 _b = Semantics.Sentence('_b')
@@ -182,6 +186,44 @@ def r_framework():
     return Semantics.BABA(language, rules, assumptions, contraries, random_variables, bayes_net)
 
 
+# The r_framework extended with random variables that no rule depends on:
+# t is conditioned on w, and u and v are purely informational (v conditioned on u)
+def informational_r_framework():
+    language = [a, _a, b, _b, c, _c, j, t, s, u, v, w]
+    rules = [Semantics.Rule(j, [a]), Semantics.Rule(_a, [b, s]), Semantics.Rule(_b, [c, t])]
+    assumptions = [a, b, c]
+    contraries = {a: Semantics.Contrary(a, _a), b: Semantics.Contrary(b, _b),
+                  c: Semantics.Contrary(c, _c)}
+    random_variables = [s, t, u, v, w]
+    bayes_net = Bayesian.BayesianNetwork({s.symbol: 0.6, u.symbol: 0.5, w.symbol: 0.3,
+                                          t.symbol: Bayesian.ConditionalProbability(t, [w], {'w': 0.2, '~w': 0.5}),
+                                          v.symbol: Bayesian.ConditionalProbability(v, [u], {'u': 0.2, '~u': 0.6})})
+    return Semantics.BABA(language, rules, assumptions, contraries, random_variables, bayes_net)
+
+
+# BABA framework whose random variable t is only used to derive j (all its worlds share their valid attacks)
+def derivation_framework():
+    language = [a, _a, b, _b, j, s, t]
+    rules = [Semantics.Rule(_a, [b, s]), Semantics.Rule(j, [a, t])]
+    assumptions = [a, b]
+    contraries = {a: Semantics.Contrary(a, _a), b: Semantics.Contrary(b, _b)}
+    random_variables = [s, t]
+    bayes_net = Bayesian.BayesianNetwork({s.symbol: 0.6, t.symbol: 0.4})
+    return Semantics.BABA(language, rules, assumptions, contraries, random_variables, bayes_net)
+
+
+# BABA framework with mutually recursive rules (j and k derive each other)
+def cyclic_framework():
+    language = [a, _a, b, _b, j, k, s]
+    rules = [Semantics.Rule(_a, [j]), Semantics.Rule(j, [k, s]), Semantics.Rule(k, [j]),
+             Semantics.Rule(k, [b]), Semantics.Rule(_b, [a])]
+    assumptions = [a, b]
+    contraries = {a: Semantics.Contrary(a, _a), b: Semantics.Contrary(b, _b)}
+    random_variables = [s]
+    bayes_net = Bayesian.BayesianNetwork({s.symbol: 0.3})
+    return Semantics.BABA(language, rules, assumptions, contraries, random_variables, bayes_net)
+
+
 ########################################################################################
 # BABA framework that shows the distinction between sceptically preferred and ideal semantics
 #
@@ -201,6 +243,54 @@ def ideal_framework():
 ########################################################################################
 
 
+########################################################################################
+# BABA framework whose grounded extension takes several iterations to reach
+# Visual representation (for AA equivalent):
+#
+#      a  <--  b  <--  c  <--  d
+#
+# With grounded extension: {b, d}
+#
+def chain_framework():
+    language = [a, _a, b, _b, c, _c, d, _d]
+    rules = [Semantics.Rule(_a, [b]), Semantics.Rule(_b, [c]), Semantics.Rule(_c, [d])]
+    assumptions = [a, b, c, d]
+    contraries = {a: Semantics.Contrary(a, _a), b: Semantics.Contrary(b, _b),
+                  c: Semantics.Contrary(c, _c), d: Semantics.Contrary(d, _d)}
+    return Semantics.BABA(language, rules, assumptions, contraries, [], None)
+
+
+# BABA framework with a chain of attacks of the given length: a0 <- a1 <- ... (each assumption attacks the previous one)
+#
+# With grounded extension (and unique complete/preferred set): every other assumption, from the last one
+#
+def attack_chain_framework(length):
+    assumptions = [Semantics.Sentence('a' + str(index)) for index in range(length)]
+    contraries = [Semantics.Sentence('_a' + str(index)) for index in range(length)]
+    rules = [Semantics.Rule(contraries[index], [assumptions[index + 1]]) for index in range(length - 1)]
+    return Semantics.BABA(assumptions + contraries, rules, assumptions,
+                          dict([(assumption, Semantics.Contrary(assumption, contrary))
+                                for assumption, contrary in zip(assumptions, contraries)]), [], None)
+
+########################################################################################
+
+
+########################################################################################
+# BABA framework without stable extensions
+# Visual representation (for AA equivalent):
+#
+#      a  <--  b  <--  c  <--  a
+#
+def odd_cycle_framework():
+    language = [a, _a, b, _b, c, _c]
+    rules = [Semantics.Rule(_a, [b]), Semantics.Rule(_b, [c]), Semantics.Rule(_c, [a])]
+    assumptions = [a, b, c]
+    contraries = {a: Semantics.Contrary(a, _a), b: Semantics.Contrary(b, _b), c: Semantics.Contrary(c, _c)}
+    return Semantics.BABA(language, rules, assumptions, contraries, [], None)
+
+########################################################################################
+
+
 # Language property does not cover framework
 def invalid_BABA_framework():
     language = [a, b, c, f]
@@ -1,6 +1,12 @@
 from PythonSemantics.SemanticsUtils import *
+from PythonSemantics import Bayesian
 import multiprocessing as mp
-import copy
+import functools
+import itertools
+import time
+import math
+import random
+from array import array
 
 GROUNDED = 1
 SCEPTICALLY_PREFERRED = 2
@@ -33,6 +39,10 @@ class BABA:
         self.compute_derivable_dictionary()
         self.compute_attacks()
 
+        self.compiled_baba = None  # CompiledBABA (computed lazily)
+        self.assumption_bitset = None  # AssumptionBitset for bitset_world (computed lazily)
+        self.bitset_world = None
+
     # Validates BABA framework
     def validate(self):
         self.validate_language_covers_all_sentences()
@@ -43,97 +53,262 @@ class BABA:
     def set_random_variable_world(self, random_variable_world):
         self.rv_world = random_variable_world
 
+    # Returns the array-backed form of the framework (compiled once)
+    def compile(self):
+        if self.compiled_baba is None:
+            self.compiled_baba = CompiledBABA(self)
+        return self.compiled_baba
+
+    # Returns the bitset encoding of the framework in the current random variable world
+    # (Implementation: memoised until the random variable world changes)
+    def bitset(self):
+        world = frozenset(self.rv_world)
+        if self.assumption_bitset is None or self.bitset_world != world:
+            self.assumption_bitset = AssumptionBitset(self)
+            self.bitset_world = world
+        return self.assumption_bitset
+
     # Checks whether all atoms defined in rules, assumptions,
     # contraries and random variables are included in the language
     def validate_language_covers_all_sentences(self):
-        exception_message = "Language must include all sentences defined in network"
         for rule in self.rules:
-            if rule.head not in self.language:
-                raise InvalidBABAException(exception_message)
-            for element in rule.body:
-                if element not in self.language:
-                    raise InvalidBABAException(exception_message)
-
-        for assumption in self.assumptions:
-            if assumption not in self.language:
-                raise InvalidBABAException(exception_message)
-
+            self.validate_in_language([rule.head] + list(rule.body))
+        self.validate_in_language(self.assumptions)
         for assumption, contrary in self.contraries.items():
-            if assumption not in self.language or contrary.contrary not in self.language:
-                raise InvalidBABAException(exception_message)
-
-        for random_variable in self.random_variables:
-            if random_variable not in self.language:
-                raise InvalidBABAException(exception_message)
+            self.validate_in_language([assumption, contrary.contrary])
+        self.validate_in_language(self.random_variables)
 
     # Checks if underlying ABA network is flat
-    def validate_is_flat(self):
-        for rule in self.rules:
-            if rule.head in self.assumptions:
-                raise InvalidBABAException("Framework is not flat")
+    # (only the given rule heads and assumptions, if any, are checked)
+    def validate_is_flat(self, heads=None, assumptions=None):
+        heads = set([rule.head for rule in self.rules]) if heads is None else heads
+        assumptions = self.assumptions if assumptions is None else assumptions
+        if not heads.isdisjoint(assumptions):
+            raise InvalidBABAException("Framework is not flat")
 
     # Ensures no random variables as heads of rules
-    def validate_random_variables(self):
-        for rule in self.rules:
-            if rule.head in self.random_variables:
-                raise InvalidBABAException("Random variables cannot be in the heads of rules")
+    # (only the given rule heads, if any, are checked)
+    def validate_random_variables(self, heads=None):
+        heads = set([rule.head for rule in self.rules]) if heads is None else heads
+        if not heads.isdisjoint(self.random_variables):
+            raise InvalidBABAException("Random variables cannot be in the heads of rules")
+
+    # Checks whether all the given sentences are included in the language
+    def validate_in_language(self, sentences):
+        if not all([sentence in self.language for sentence in sentences]):
+            raise InvalidBABAException("Language must include all sentences defined in network")
+
+    # Checks a rule to be added: its sentences are in the language and its head
+    # is neither an assumption nor a random variable
+    def validate_rule(self, rule):
+        self.validate_in_language([rule.head] + list(rule.body))
+        self.validate_is_flat(set([rule.head]))
+        self.validate_random_variables(set([rule.head]))
 
 #################################################################################
 
     def compute_derivable_dictionary(self):
-        for sentence in self.language:
+        self.reset_derivations(self.language)
+
+    # Resets the derivations of the given claims to the bodies of their rules (undoing compute_required_to_derive())
+    def reset_derivations(self, claims):
+        for sentence in claims:
             self.derivable_dictionary[sentence] = []
+            self.derived_claims.pop(sentence, None)
 
         for rule in self.rules:
+            if rule.head not in claims or rule.head in self.derived_claims:
+                continue
             if len(rule.body) == 0:
-                self.derivable_dictionary[rule.head] = [[]]
+                self.derivable_dictionary[rule.head] = [frozenset()]  # A fact needs nothing else
                 self.derived_claims[rule.head] = True
             else:
                 self.derivable_dictionary[rule.head].append(list(rule.body))
 
-    # Returns a list of lists of sentences required to derive the claim
+    # Returns the minimal sets (frozensets) of sentences required to derive the claim. A sentence that is
+    # neither an assumption nor a random variable may stand for itself, so the claim is one of its own supports.
+    # A support without assumptions that have contraries cannot be counter-attacked (and so does not have to be
+    # by an admissible set): it only subsumes the supersets that cannot be counter-attacked either
     def compute_required_to_derive(self, claim):
-        if claim in self.derived_claims:
-            return self.derivable_dictionary[claim]  # Memoisation
-
+        if claim not in self.derived_claims:
+            for component in self.derivation_components(claim):
+                self.derive_component(component)
+
+        return self.derivable_dictionary[claim]  # Memoisation
+
+    # Returns the sentences (not yet derived) that appear in the bodies of the rules of the given sentence
+    def derivation_dependencies(self, sentence):
+        return [element for required_set in self.derivable_dictionary[sentence] for element in required_set
+                if element not in self.assumptions and element not in self.random_variables and
+                element not in self.derived_claims]
+
+    # Returns the strongly connected components of the sentences (not yet derived) the claim depends on,
+    # each after the components it depends on (iterative Tarjan's algorithm)
+    def derivation_components(self, claim):
+        index = {claim: 0}
+        lowlink = {claim: 0}
+        stack = [claim]
+        on_stack = set([claim])
+        to_visit = [(claim, iter(self.derivation_dependencies(claim)))]
+        components = []
+
+        while len(to_visit) > 0:
+            sentence, dependencies = to_visit[-1]
+            for dependency in dependencies:
+                if dependency not in index:
+                    index[dependency] = lowlink[dependency] = len(index)
+                    stack.append(dependency)
+                    on_stack.add(dependency)
+                    to_visit.append((dependency, iter(self.derivation_dependencies(dependency))))
+                    break
+                elif dependency in on_stack:
+                    lowlink[sentence] = min(lowlink[sentence], index[dependency])
+            else:
+                to_visit.pop()
+                if len(to_visit) > 0:
+                    parent = to_visit[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[sentence])
+
+                if lowlink[sentence] == index[sentence]:
+                    component = []
+                    while sentence not in component:
+                        component.append(stack.pop())
+                        on_stack.remove(component[-1])
+                    components.append(component)
+
+        return components
+
+    # Computes the supports of the sentences of a strongly connected component, once all the components it
+    # depends on are derived. Supports inside a cycle are iterated (from the sentences themselves) to a fixpoint
+    def derive_component(self, component):
+        supports = dict([(claim, [frozenset([claim])]) for claim in component])
+        cyclic = len(component) > 1 or component[0] in self.derivation_dependencies(component[0])
+
+        changed = True
+        while changed:
+            changed = False
+            for claim in component:
+                required_to_derive_sets = self.combine_derivations(claim, supports)
+                if set(required_to_derive_sets) != set(supports[claim]):
+                    supports[claim] = required_to_derive_sets
+                    changed = cyclic
+
+        for claim in component:
+            self.derivable_dictionary[claim] = supports[claim]
+            self.derived_claims[claim] = True
+
+    # Returns the minimal supports of the claim given by its rules, taking the supports of the sentences of its
+    # component from the given dictionary and those of other sentences from the derived ones
+    def combine_derivations(self, claim, supports):
         required_to_derive_sets = []
         for required_set in self.derivable_dictionary[claim]:
-            required_to_derive_required_set = [[]]
+            required_to_derive_required_set = [frozenset()]
             for required_elem in required_set:
                 if required_elem in self.assumptions or required_elem in self.random_variables:
-                    required_to_derive_required_set = list_combinations(required_to_derive_required_set, [[required_elem]])
-
+                    required_to_derive_elem = [frozenset([required_elem])]
+                elif required_elem in supports:
+                    required_to_derive_elem = supports[required_elem]
                 else:
-                    required_to_derive_elem = self.compute_required_to_derive(required_elem)
-                    required_to_derive_elem.append([required_elem])  # Can derive an elem if elem is present
-                    required_to_derive_required_set = list_combinations(required_to_derive_required_set, required_to_derive_elem)
+                    required_to_derive_elem = self.derivable_dictionary[required_elem]
+                required_to_derive_required_set = support_combinations(
+                    required_to_derive_required_set, required_to_derive_elem, self.counterable)
 
-            for item in required_to_derive_required_set:
-                required_to_derive_sets.append(item)
+            required_to_derive_sets.extend(required_to_derive_required_set)
 
-        required_to_derive_sets.append([claim])
-        self.derivable_dictionary[claim] = required_to_derive_sets
-        self.derived_claims[claim] = True
-        return required_to_derive_sets
+        return minimal_supports(required_to_derive_sets + [frozenset([claim])], self.counterable)
+
+    # Returns whether an attack with the given support can be counter-attacked
+    def counterable(self, support):
+        return any([element in self.contraries for element in support])
 
     def derivable(self, claim, sentences):
-        sets_that_derive_claim = self.compute_required_to_derive(claim)
-        for deriving_set in sets_that_derive_claim:
-            if frozenset(deriving_set).issubset(frozenset(sentences)):
-                return True
-        return False
+        return claim in self.closure(sentences)
+
+    # Returns the set of all sentences derivable from the given sentences (including them)
+    def closure(self, sentences):
+        return self.compile().closure(sentences)
 
     def compute_attacks(self):
         for assumption in self.assumptions:
-            attacks = set()
-            if assumption in self.contraries:
+            self.compute_attacks_on(assumption)
 
-                contrary = self.contraries[assumption].contrary
-                required_to_derive_contrary_lists = self.compute_required_to_derive(contrary)
-                for required_list in required_to_derive_contrary_lists:
-                    attacks.add(Attack(assumption, set(required_list)))
+    def compute_attacks_on(self, assumption):
+        attacks = set()
+        if assumption in self.contraries:
 
-            self.attacks[assumption] = attacks
+            contrary = self.contraries[assumption].contrary
+            for required_set in self.compute_required_to_derive(contrary):
+                attacks.add(Attack(assumption, set(required_set)))
+
+        self.attacks[assumption] = attacks
+
+#################################################################################
+# Incremental changes: only the derivations that depend on the changed sentences,
+# and the attacks with those contraries, are recomputed
+
+    def add_rule(self, rule):
+        self.validate_rule(rule)
+
+        self.rules.append(rule)
+        self.update_derivations(self.dependent_sentences([rule.head]))
+
+    def remove_rule(self, rule):
+        if rule not in self.rules:
+            raise InvalidBABAException("Rule is not in the framework: " + str(rule))
+
+        affected = self.dependent_sentences([rule.head])
+        self.rules.remove(rule)
+        self.update_derivations(affected)
+
+    # Adds an assumption (optionally with its contrary)
+    def add_assumption(self, assumption, contrary=None):
+        self.validate_in_language([assumption] if contrary is None else [assumption, contrary])
+        self.validate_is_flat(assumptions=set([assumption]))
+        if assumption in self.random_variables:
+            raise InvalidBABAException("Random variables cannot be assumptions")
+
+        self.assumptions.add(assumption)
+        if contrary is not None:
+            self.contraries[assumption] = Contrary(assumption, contrary)
+        self.update_derivations(self.dependent_sentences([assumption]), [assumption])
+
+    def set_contrary(self, assumption, contrary):
+        if assumption not in self.assumptions:
+            raise InvalidBABAException("Contraries can only be set for assumptions")
+        self.validate_in_language([contrary])
+
+        self.contraries[assumption] = Contrary(assumption, contrary)
+        self.update_derivations(self.dependent_sentences([assumption]), [assumption])
+
+    # Returns the given sentences and the sentences whose derivations depend on them
+    def dependent_sentences(self, sentences):
+        heads_by_body_element = {}
+        for rule in self.rules:
+            for element in rule.body:
+                heads_by_body_element.setdefault(element, set()).add(rule.head)
+
+        dependent = set(sentences)
+        to_visit = list(dependent)
+        while len(to_visit) > 0:
+            for head in heads_by_body_element.get(to_visit.pop(), []):
+                if head not in dependent:
+                    dependent.add(head)
+                    to_visit.append(head)
+
+        return dependent
+
+    # Recomputes the derivations of the affected sentences and the attacks on the given assumptions
+    # and on the assumptions whose contraries are affected
+    def update_derivations(self, affected, assumptions=[]):
+        self.reset_derivations(affected)
+        for assumption in self.assumptions:
+            if assumption in assumptions or \
+                    (assumption in self.contraries and self.contraries[assumption].contrary in affected):
+                self.compute_attacks_on(assumption)
+
+        self.compiled_baba = None
+        self.assumption_bitset = None
+        self.bitset_world = None
 
     # def compute_counter_attacks(self):
     #     for assumption in self.assumptions:
@@ -149,6 +324,122 @@ class BABA:
 ###################################
 
 
+# Frozen, array-backed form of a BABA framework (it does not depend on the random variable world).
+# Sentences are numbered in str order and lists of ids are stored CSR-style (the ids of item i are
+# ids[offsets[i]:offsets[i + 1]]): the distinct body elements of each rule and the rules using each
+# sentence. contrary[sentence id] is the id of the sentence's contrary (-1 if it has none). Attacks are
+# records grouped by the attacked assumption (attacks on assumption i are attack_offsets[i] up to
+# attack_offsets[i + 1]), each with the mask of the assumptions in its support (bits as in
+# AssumptionBitset), the ids of its other support elements (which must hold in the world for the attack
+# to be valid), the ids of the contraries of its support and its support size. The attacks whose
+# support contains a sentence are indexed CSR-style by the sentence id (supporting_attacks())
+class CompiledBABA:
+    def __init__(self, baba):
+        self.sentences = tuple(sorted(baba.language, key=lambda sentence: (str(sentence), sentence.random_variable)))
+        self.ids = dict([(sentence, index) for index, sentence in enumerate(self.sentences)])
+
+        bodies = [sorted(set([self.ids[element] for element in rule.body])) for rule in baba.rules]
+        self.heads = array('i', [self.ids[rule.head] for rule in baba.rules])
+        self.body_sizes = array('i', [len(body) for body in bodies])
+        self.body_offsets, self.body_ids = csr(bodies)
+        uses = [[] for _ in self.sentences]
+        for index, body in enumerate(bodies):
+            for element in body:
+                uses[element].append(index)
+        self.use_offsets, self.use_rules = csr(uses)
+        self.facts = array('i', [index for index, body in enumerate(bodies) if len(body) == 0])
+
+        self.assumptions = tuple(sorted(baba.assumptions, key=str))
+        self.assumption_index = dict([(assumption, index) for index, assumption in enumerate(self.assumptions)])
+        self.contrary = array('i', [-1] * len(self.sentences))
+        for assumption, contrary in baba.contraries.items():
+            self.contrary[self.ids[assumption]] = self.ids[contrary.contrary]
+
+        masks, outside, support_contraries, attack_counts = [], [], [], []
+        supporting = [[] for _ in self.sentences]
+        for assumption in self.assumptions:
+            attacks = baba.attacks.get(assumption, set())
+            attack_counts.append(len(attacks))
+            for attack in attacks:
+                for elem in set(attack.support):
+                    supporting[self.ids[elem]].append(len(masks))
+                masks.append(sum([1 << self.assumption_index[elem] for elem in set(attack.support)
+                                  if elem in self.assumption_index]))
+                outside.append([self.ids[elem] for elem in attack.support if elem not in self.assumption_index])
+                support_contraries.append(sorted(set([self.contrary[self.ids[elem]] for elem in attack.support
+                                                      if self.contrary[self.ids[elem]] >= 0])))
+        self.attack_offsets = array('i', [0] + list(itertools.accumulate(attack_counts)))
+        self.attack_masks = tuple(masks)
+        self.outside_offsets, self.outside_ids = csr(outside)
+        self.support_contrary_offsets, self.support_contrary_ids = csr(support_contraries)
+        self.attack_targets = array('i', [index for index, count in enumerate(attack_counts) for _ in range(count)])
+        self.support_sizes = array('i', [bin(mask).count('1') + len(elements) for mask, elements in zip(masks, outside)])
+        self.supporting_offsets, self.supporting_ids = csr(supporting)
+
+    # Returns the ids of the sentences of the random variable world
+    def world_ids(self, world):
+        return set([self.ids[rv] for rv in world if rv in self.ids])
+
+    # Returns the attacks on the assumption with the given index
+    def attacks_on(self, index):
+        return range(self.attack_offsets[index], self.attack_offsets[index + 1])
+
+    # Returns the attacks whose support contains the sentence with the given id
+    def supporting_attacks(self, sentence_id):
+        return self.supporting_ids[self.supporting_offsets[sentence_id]:self.supporting_offsets[sentence_id + 1]]
+
+    def outside_support(self, attack):
+        return self.outside_ids[self.outside_offsets[attack]:self.outside_offsets[attack + 1]]
+
+    def support_contraries(self, attack):
+        return self.support_contrary_ids[self.support_contrary_offsets[attack]:self.support_contrary_offsets[attack + 1]]
+
+    # An attack is valid iff the support elements other than assumptions hold in the world (given as ids)
+    def valid(self, attack, world_ids):
+        return all(elem in world_ids for elem in self.outside_support(attack))
+
+    # Returns derived[sentence id] = 1 for every sentence derivable from the given sentences (including them)
+    # (Implementation: counter based forward chaining - every rule counts the body elements not yet
+    # derived and its head is derived when the count reaches zero, so each rule is visited once per
+    # body element)
+    def closure_flags(self, sentences):
+        derived = bytearray(len(self.sentences))
+        agenda = []
+        for sentence in sentences:
+            index = self.ids.get(sentence)
+            if index is not None and not derived[index]:
+                derived[index] = 1
+                agenda.append(index)
+        for rule in self.facts:
+            if not derived[self.heads[rule]]:
+                derived[self.heads[rule]] = 1
+                agenda.append(self.heads[rule])
+
+        remaining = array('i', self.body_sizes)
+        while len(agenda) > 0:
+            index = agenda.pop()
+            for position in range(self.use_offsets[index], self.use_offsets[index + 1]):
+                rule = self.use_rules[position]
+                remaining[rule] -= 1
+                if remaining[rule] == 0 and not derived[self.heads[rule]]:
+                    derived[self.heads[rule]] = 1
+                    agenda.append(self.heads[rule])
+
+        return derived
+
+    # Returns the set of all sentences derivable from the given sentences (including them)
+    def closure(self, sentences):
+        sentences = set(sentences)
+        return set(itertools.compress(self.sentences, self.closure_flags(sentences))).union(
+            [sentence for sentence in sentences if sentence not in self.ids])
+
+
+# Returns (offsets, ids) - the lists concatenated into ids, list i being ids[offsets[i]:offsets[i + 1]]
+def csr(lists):
+    return array('i', [0] + list(itertools.accumulate([len(a_list) for a_list in lists]))), \
+        array('i', [elem for a_list in lists for elem in a_list])
+
+
 class Sentence:
     def __init__(self, symbol, random_variable=False, negation=False):
         self.symbol = symbol
@@ -223,16 +514,138 @@ class SemanticSet:
         self.elements = frozenset(elements)
 
     def __hash__(self):
-        return sum([hash(item) for item in self.elements])
+        return hash(self.elements)
 
     def __eq__(self, other):
-        return all([elem in other.elements for elem in self.elements]) \
-               and len(self.elements) == len(other.elements)
+        return self.elements == other.elements
 
     def __str__(self):
         return "[" + ', '.join([str(elem) for elem in self.elements]) + "]"
 
 
+# Bitset encoding of the assumptions of a BABA framework in its current random variable world.
+# Each assumption is assigned a bit, so that a set of assumptions is an int and subset and
+# conflict tests are bitwise operations. The supports of the valid attacks against each
+# assumption are stored as masks (random variables in a valid support hold in the world).
+# Conversion to and from Sentences only happens at the API boundary (mask(), semantic_set())
+class AssumptionBitset:
+    def __init__(self, baba):
+        compiled = baba.compile()
+        self.assumptions = list(compiled.assumptions)
+        self.bits = dict([(assumption, 1 << index) for index, assumption in enumerate(self.assumptions)])
+        self.all = (1 << len(self.assumptions)) - 1
+        self.contrary_mask = self.mask([elem for elem in self.assumptions if compiled.contrary[compiled.ids[elem]] >= 0])
+
+        # valid[attack] = whether the attack of the compiled framework is valid in the world
+        # attacks[index] = sorted list of support masks of the valid attacks against assumption index
+        world = compiled.world_ids(baba.rv_world)
+        self.compiled = compiled
+        self.assumption_ids = [compiled.ids[assumption] for assumption in self.assumptions]
+        self.valid = bytearray([compiled.valid(attack, world) for attack in range(len(compiled.attack_masks))])
+        self.attacks = [sorted(set([compiled.attack_masks[attack] for attack in compiled.attacks_on(index)
+                                    if self.valid[attack]]))
+                        for index in range(len(self.assumptions))]
+
+    # Returns a canonical key of the valid attacks: worlds with equal keys have equal extensions
+    def attack_key(self):
+        return tuple(tuple(supports) for supports in self.attacks)
+
+    # Returns the mask of the assumptions among the given sentences
+    def mask(self, sentences):
+        mask = 0
+        for sentence in sentences:
+            mask |= self.bits.get(sentence, 0)
+        return mask
+
+    # Returns the indices of the assumptions in the mask
+    def indices(self, mask):
+        return [index for index in range(len(self.assumptions)) if mask >> index & 1]
+
+    def sentences(self, mask):
+        return [self.assumptions[index] for index in self.indices(mask)]
+
+    def semantic_set(self, mask):
+        return SemanticSet(self.sentences(mask))
+
+    # Returns the mask of the assumptions attacked by the set
+    # (the contrary is derivable iff the support of a valid attack is contained in the set)
+    def attacked(self, mask):
+        attacked = 0
+        for index, supports in enumerate(self.attacks):
+            if any(support & mask == support for support in supports):
+                attacked |= 1 << index
+        return attacked
+
+    def conflict_free(self, mask):
+        return not any(support & mask == support for index in self.indices(mask) for support in self.attacks[index])
+
+    # Returns whether a conflict free set stays conflict free with the assumption added. Only the attacks on the
+    # assumption and the valid attacks whose support contains it (found through the reverse index) can newly hold
+    def conflict_free_with(self, mask, index):
+        extended = mask | (1 << index)
+        if any(support & extended == support for support in self.attacks[index]):
+            return False
+
+        compiled = self.compiled
+        for attack in compiled.supporting_attacks(self.assumption_ids[index]):
+            support = compiled.attack_masks[attack]
+            if self.valid[attack] and extended >> compiled.attack_targets[attack] & 1 and support & extended == support:
+                return False
+        return True
+
+    # Returns the assumptions attacked by the set with the assumption added, given those attacked by the set:
+    # the newly attacked ones are the targets of the valid attacks whose support the assumption completes
+    def attacked_with(self, attacked, mask, index):
+        extended = mask | (1 << index)
+        compiled = self.compiled
+        for attack in compiled.supporting_attacks(self.assumption_ids[index]):
+            support = compiled.attack_masks[attack]
+            if self.valid[attack] and support & extended == support:
+                attacked |= 1 << compiled.attack_targets[attack]
+        return attacked
+
+    # Attacks whose support has no contrary cannot be counter attacked and
+    # (unless they make the set conflicting) do not prevent admissibility
+    def is_admissible(self, mask):
+        if not self.conflict_free(mask):
+            return False
+
+        return self.counters_attacks(mask, self.attacked(mask))
+
+    # Returns whether every attack on the members of the set is counter attacked (given the assumptions the set attacks)
+    def counters_attacks(self, mask, attacked):
+        return all(support & attacked or not support & self.contrary_mask
+                   for index in self.indices(mask) for support in self.attacks[index])
+
+    # Returns whether the members of the set can still be defended by a set within 'reachable'
+    # (attacked() is monotone: counter attacks that 'reachable' cannot make, no subset of it can)
+    def defensible(self, mask, reachable):
+        return self.counters_attacks(mask, self.attacked(reachable))
+
+    # Returns the largest admissible subset of a conflict free set: members whose attacks the set
+    # does not counter are removed until every remaining member is defended (admissible subsets
+    # of a conflict free set are closed under union, so the result is unique)
+    def admissible_core(self, mask):
+        while True:
+            attacked = self.attacked(mask)
+            core = 0
+            for index in self.indices(mask):
+                if all(support & attacked or not support & self.contrary_mask for support in self.attacks[index]):
+                    core |= 1 << index
+            if core == mask:
+                return mask
+            mask = core
+
+    # Returns the mask of the assumptions defended by the set (all valid attacks are counter attacked)
+    def defended(self, mask):
+        attacked = self.attacked(mask)
+        defended = 0
+        for index, supports in enumerate(self.attacks):
+            if all(support & attacked for support in supports):
+                defended |= 1 << index
+        return defended
+
+
 class InvalidBABAException(Exception):
     def __init__(self, message):
         self.message = message
@@ -253,12 +666,16 @@ def derivable(baba, claim, sentences):
     return baba.derivable(claim, set(sentences).union(set(baba.rv_world)))
 
 
+# Returns the set of all sentences derivable from the given sentences and the random variable world
+def derived_sentences(baba, sentences):
+    return baba.closure(set(sentences).union(set(baba.rv_world)))
+
+
 # Returns the complete set of sentences derivable from the BABA framework given a set of sentences
 def derivable_set(baba, sentences):
-    for sentence in baba.language:
-        if sentence not in sentences and derivable(baba, sentence, sentences):
-            return derivable_set(baba, sentences + [sentence])
-    return sentences
+    derived = derived_sentences(baba, sentences)
+    return list(sentences) + [sentence for sentence in baba.language
+                              if sentence not in sentences and sentence in derived]
 
 
 # Returns a set of contraries to the given set of sentences in the BABA framework
@@ -289,19 +706,21 @@ def valid_attack(baba, attack):
 # Returns whether the set of assumptions defends the claim -
 # where A defends a iff A attacks all sets of assumptions that attack a)
 def defends(baba, assumptions, claim):
-    attacks = baba.attacks[claim]
-    for attack in attacks:
+    compiled = baba.compile()
+    world = compiled.world_ids(baba.rv_world)
+    derived = None  # Sentences derivable from assumptions (computed once, when first needed)
+    for attack in compiled.attacks_on(compiled.assumption_index[claim]):
 
-        if not valid_attack(baba, attack):
+        if not compiled.valid(attack, world):
             continue
 
-        support_contraries = contraries(baba, attack.support)
-        if len(attack.support) == 0:  # Attack cannot be countered
-            is_counter_attacked = False
-        elif len(support_contraries) == 0:  # Attack support has no contrary
+        support_contraries = compiled.support_contraries(attack)
+        if len(support_contraries) == 0:  # Attack support (if any) has no contrary
             is_counter_attacked = False
         else:
-            is_counter_attacked = any([derivable(baba, elem, assumptions) for elem in support_contraries])
+            if derived is None:
+                derived = compiled.closure_flags(set(assumptions).union(set(baba.rv_world)))
+            is_counter_attacked = any([derived[elem] for elem in support_contraries])
 
         if not is_counter_attacked:
             return False
@@ -309,40 +728,152 @@ def defends(baba, assumptions, claim):
     return True
 
 
-# Returns whether the list of assumptions is conflict free
-# (Implementation: derivable() is lazily evaluated and memoised.)
+# Returns whether the list of assumptions is conflict free: no attack (on a member, or among the given
+# attacks) has its support within the list and the random variable world (see conflict_sentences())
+# (Implementation: bitwise subset tests on the framework's AssumptionBitset. Lists that include
+# sentences other than assumptions count the support elements they hit through the reverse index.)
 def conflict_free(baba, assumptions, attacks=None):
-    attacks = attacks if attacks is not None else get_attacks(baba, assumptions)
-    for attack in attacks:
-        if attack.support.issubset(assumptions):
-            return False
+    present = conflict_sentences(baba, assumptions)
+    if attacks is not None:
+        return not any(attack.support.issubset(present) for attack in attacks)
 
-    return True
+    bitset = baba.bitset()
+    if all(sentence in bitset.bits for sentence in assumptions):
+        return bitset.conflict_free(bitset.mask(assumptions))
 
+    # The list conflicts iff a member is attacked with all the support hit
+    compiled = baba.compile()
+    hits = array('i', [0] * len(compiled.attack_masks))
+    for sentence in present:
+        if sentence in compiled.ids:
+            for attack in compiled.supporting_attacks(compiled.ids[sentence]):
+                hits[attack] += 1
 
-# Returns whether the list of assumptions is admissible in the BABA framework
-def is_admissible(baba, assumptions):
-    attacks = get_attacks(baba, assumptions)
+    return not any(hits[attack] == compiled.support_sizes[attack]
+                   for sentence in assumptions if sentence in compiled.assumption_index
+                   for attack in compiled.attacks_on(compiled.assumption_index[sentence]))
 
-    for attack in attacks:
-        if attack.support.issubset(assumptions):  # Check if conflict free
-            return False
 
-        if not valid_attack(baba, attack):
-            continue
+# Returns the sentences an attack support may use to make the list conflicting: those of the list
+# and the random variables of the world (random variables of the list that do not hold are left out)
+def conflict_sentences(baba, sentences):
+    return set([sentence for sentence in sentences if not sentence.random_variable]).union(baba.rv_world)
 
-        support_contraries = contraries(baba, attack.support)
-        if not any(derivable(baba, s, assumptions) for s in support_contraries)\
-                and len(support_contraries) > 0:
-            return False
 
-    return True
+# Returns whether the list of assumptions is admissible in the BABA framework
+def is_admissible(baba, assumptions):
+    bitset = baba.bitset()
+    return bitset.is_admissible(bitset.mask(assumptions))
 
 
 # Generates the complete set of admissible sets of assumptions
+# (Implementation: backtracking search over the assumptions, see extend_admissible())
 def admissible(baba):
-    ps = powerset(baba.assumptions)
-    return set([SemanticSet(elem) for elem in ps if is_admissible(baba, elem)])
+    bitset = baba.bitset()
+    return set([bitset.semantic_set(mask) for mask in extend_admissible(bitset, 0, 0)])
+
+
+# Grows the candidate mask one assumption at a time (with and without assumption 'index').
+# Branches are pruned as soon as the candidate is conflicting, as no superset of a conflicting
+# set is conflict free, or once its members can no longer be defended by the assumptions still
+# available; yields the complete candidates that are admissible (only subsets of 'within', if given)
+# (the search gives up once time.monotonic() passes the deadline, if given - as do the other searches)
+def extend_admissible(bitset, index, candidate, deadline=None, attacked=None, within=None):
+    if deadline is not None and time.monotonic() > deadline:
+        return
+    available = (bitset.all if within is None else within) >> index << index
+    if not bitset.defensible(candidate, candidate | available):
+        return
+    attacked = bitset.attacked(candidate) if attacked is None else attacked  # Grown with the candidate
+    if index == len(bitset.assumptions):
+        if bitset.counters_attacks(candidate, attacked):
+            yield candidate
+        return
+
+    if available >> index & 1 and bitset.conflict_free_with(candidate, index):
+        yield from extend_admissible(bitset, index + 1, candidate | (1 << index), deadline,
+                                     bitset.attacked_with(attacked, candidate, index), within)
+    yield from extend_admissible(bitset, index + 1, candidate, deadline, attacked, within)
+
+
+# Returns the masks of the given admissible sets (or of all admissible sets if None)
+def admissible_masks(baba, admissibles=None):
+    bitset = baba.bitset()
+    if admissibles is None:
+        return list(extend_admissible(bitset, 0, 0))
+    return [bitset.mask(admissible_set.elements) for admissible_set in admissibles]
+
+
+# Returns the subset maximal masks, largest first
+def maximal_masks(masks):
+    maximal = []
+    for mask in sorted(set(masks), key=lambda m: bin(m).count('1'), reverse=True):
+        if not any(mask & other == mask for other in maximal):
+            maximal.append(mask)
+    return maximal
+
+
+# Returns the masks of the preferred sets among the given admissible sets
+# (or of the framework, searched directly, if None)
+def preferred_masks(baba, admissibles=None):
+    if admissibles is None:
+        return list(extend_preferred(baba.bitset(), 0, 0, []))
+    return maximal_masks(admissible_masks(baba, admissibles))
+
+
+# Searches for the subset maximal admissible sets without enumerating the admissible sets.
+# Each assumption is included before it is excluded, so every superset of a candidate is
+# explored before the candidate itself: an admissible candidate that is not contained in a
+# preferred set already found is preferred. propagate_preferred() labels the assumptions that
+# every preferred superset of the candidate includes or excludes, and branches that can only
+# produce subsets of a preferred set already found, or in which the candidate can no longer be
+# defended, are skipped. Yields the preferred masks (appended to 'found')
+# (excluded: mask of the assumptions labelled out of the candidate)
+def extend_preferred(bitset, index, candidate, found, deadline=None, excluded=0):
+    if deadline is not None and time.monotonic() > deadline:
+        return
+    labelling = propagate_preferred(bitset, candidate, excluded)
+    if labelling is None:
+        return
+    candidate, excluded = labelling
+
+    reachable = bitset.all & ~excluded
+    if any(reachable & other == reachable for other in found) or not bitset.defensible(candidate, reachable):
+        return
+
+    while index < len(bitset.assumptions) and (candidate | excluded) >> index & 1:
+        index += 1  # Already labelled
+
+    if index == len(bitset.assumptions):
+        if bitset.is_admissible(candidate):
+            found.append(candidate)
+            yield candidate
+        return
+
+    if bitset.conflict_free_with(candidate, index):
+        yield from extend_preferred(bitset, index + 1, candidate | (1 << index), found, deadline, excluded)
+    yield from extend_preferred(bitset, index + 1, candidate, found, deadline, excluded | (1 << index))
+
+
+# Applies the constraints every preferred superset of the candidate satisfies until nothing changes:
+#  - assumptions attacked by the candidate are labelled out (failing if one of them is in),
+#  - assumptions with a contrary that the candidate defends are labelled in (failing if one of them
+#    is out), as adding them to an admissible set keeps it admissible.
+# Returns the extended (candidate, excluded) or None if no preferred set extends the labelling
+def propagate_preferred(bitset, candidate, excluded):
+    while True:
+        attacked = bitset.attacked(candidate)
+        if attacked & candidate:
+            return None
+        excluded |= attacked
+
+        defended = bitset.defended(candidate) & bitset.contrary_mask
+        if defended & excluded:
+            return None
+
+        if defended & ~candidate == 0:
+            return candidate, excluded
+        candidate |= defended
 
 
 ############################################################
@@ -350,202 +881,699 @@ def admissible(baba):
 # that satisfy the corresponding semantics
 
 def preferred(baba, admissibles=None):
-    admissible_sets = admissibles if admissibles is not None else admissible(baba)
-    preferred_sets = []
-
-    for ad_set in admissible_sets:
-        remaining_sets = admissible_sets - set([ad_set])
-
-        if not any([all([elem in current.elements for elem in ad_set.elements])
-                    for current in remaining_sets]):
-            preferred_sets.append(ad_set)
-
-    return preferred_sets
+    bitset = baba.bitset()
+    return [bitset.semantic_set(mask) for mask in preferred_masks(baba, admissibles)]
 
 
 def sceptically_preferred(baba, admissibles=None):
-    admissible_sets = admissibles if admissibles is not None else admissible(baba)
-    preferred_sets = preferred(baba, admissible_sets)
-    return set([group_intersection(preferred_sets)])
+    bitset = baba.bitset()
+    masks = preferred_masks(baba, admissibles)
+    intersection = functools.reduce(lambda x, y: x & y, masks) if len(masks) > 0 else 0
+    return set([bitset.semantic_set(intersection)])
 
 
+# Complete sets are enumerated by labelling (see extend_complete()) unless admissible sets are given
 def complete(baba, admissibles=None):
-    admissible_sets = admissibles if admissibles is not None else admissible(baba)
-    complete_sets = []
-
-    for ad_set in admissible_sets:
-        elements_not_in_set = [elem for elem in baba.assumptions if elem not in ad_set.elements]
-        if not any([defends(baba, ad_set.elements, element) for element in elements_not_in_set]):
-            complete_sets.append(ad_set)
+    bitset = baba.bitset()
+    if admissibles is None:
+        return [bitset.semantic_set(mask) for mask in extend_complete(bitset, 0, 0)]
+
+    return [bitset.semantic_set(mask) for mask in admissible_masks(baba, admissibles)
+            if bitset.defended(mask) & ~mask == 0]
+
+
+# Enumerates complete sets through labellings of the assumptions: 'in' (the set), 'out' (attacked
+# by the set) or 'undec' (neither). Assumptions are branched on in turn (in first, then out/undec)
+# and propagate_complete() labels everything the in set already determines.
+# Yields the complete masks (in_mask: labelled in, excluded_mask: labelled out or undec)
+def extend_complete(bitset, in_mask, excluded_mask, deadline=None):
+    if deadline is not None and time.monotonic() > deadline:
+        return
+    labelling = propagate_complete(bitset, in_mask, excluded_mask)
+    if labelling is None:
+        return
+    in_mask, excluded_mask = labelling
+
+    unlabelled = bitset.all & ~(in_mask | excluded_mask)
+    if unlabelled == 0:
+        if bitset.is_admissible(in_mask):
+            yield in_mask
+        return
+
+    next_assumption = unlabelled & -unlabelled  # Lowest unlabelled assumption
+    yield from extend_complete(bitset, in_mask | next_assumption, excluded_mask, deadline)
+    yield from extend_complete(bitset, in_mask, excluded_mask | next_assumption, deadline)
+
+
+# Applies the complete labelling constraints until nothing changes:
+#  - assumptions attacked by the in set are labelled out (failing if one of them is in),
+#  - assumptions defended by the in set are labelled in (failing if one of them is out/undec),
+#  - fails if an in assumption cannot be defended by the assumptions not labelled out/undec.
+# Returns the extended (in_mask, excluded_mask) or None if no complete set extends the labelling
+def propagate_complete(bitset, in_mask, excluded_mask):
+    while True:
+        attacked = bitset.attacked(in_mask)
+        if attacked & in_mask:
+            return None
+        excluded_mask |= attacked
+
+        defended = bitset.defended(in_mask)
+        if defended & excluded_mask or not bitset.defensible(in_mask, bitset.all & ~excluded_mask):
+            return None
+
+        if defended & ~in_mask == 0:
+            return in_mask, excluded_mask
+        in_mask |= defended
+
+
+# The grounded extension does not depend on the admissible sets ('admissibles'
+# is accepted for consistency with the other semantics)
+def grounded(baba, admissibles=None):
+    return set([grounded_extension(baba)])
 
-    return complete_sets
 
-
-def grounded(baba, admissibles=None):
-    admissible_sets = admissibles if admissibles is not None else admissible(baba)
-    return set(minimal_set(complete(baba, admissible_sets)))
+# Computes the grounded extension as the least fixed point of the characteristic function:
+# starting from the unattacked assumptions, repeatedly adds every assumption the set defends
+def grounded_extension(baba):
+    bitset = baba.bitset()
+    extension = 0
+    while True:
+        defended = bitset.defended(extension)
+        if defended == extension:
+            return bitset.semantic_set(extension)
+        extension = defended
 
 
+# The ideal sets are the admissible subsets of the ideal extension (searched within it,
+# see ideal_extension()) unless admissible sets are given
 def ideal(baba, admissibles=None):
-    admissible_sets = admissibles if admissibles is not None else admissible(baba)
-    preferred_sets = preferred(baba, admissible_sets)
-    return [p for p in admissible_sets if
-            all([elem in other.elements for elem in p.elements for other in preferred_sets])]
-
+    bitset = baba.bitset()
+    if admissibles is None:
+        extension = bitset.mask(ideal_extension(baba).elements)
+        return [bitset.semantic_set(mask) for mask in extend_admissible(bitset, 0, 0, within=extension)]
+
+    masks = admissible_masks(baba, admissibles)
+    intersection = functools.reduce(lambda x, y: x & y, maximal_masks(masks), bitset.all)
+    return [bitset.semantic_set(mask) for mask in masks if mask & intersection == mask]
+
+
+# Computes the ideal extension: the maximal admissible set contained in every preferred set.
+# Candidates are restricted to the assumptions in all preferred sets (searched directly, without
+# the admissible sets), and the candidates that cannot be defended are then removed iteratively
+# (preferred_intersection: the mask of the assumptions in all preferred sets, if already known)
+def ideal_extension(baba, preferred_intersection=None):
+    bitset = baba.bitset()
+    if preferred_intersection is None:
+        preferred_intersection = preferred_intersection_mask(baba)
+    return bitset.semantic_set(bitset.admissible_core(preferred_intersection))
+
+
+# Returns the mask of the assumptions in all preferred sets (searched directly)
+def preferred_intersection_mask(baba):
+    return functools.reduce(lambda x, y: x & y, preferred_masks(baba), baba.bitset().all)
+
+
+# Stable sets are searched for directly unless admissible sets are given
+# (first_only: stop after the first stable set is found)
+def stable(baba, admissibles=None, first_only=False):
+    if admissibles is None:
+        bitset = baba.bitset()
+        stable_sets = []
+        for mask in extend_stable(bitset, 0, 0):
+            stable_sets.append(bitset.semantic_set(mask))
+            if first_only:
+                break
+        return stable_sets
 
-def stable(baba, admissibles=None):
-    admissible_sets = admissibles if admissibles is not None else admissible(baba)
     stable_sets = []
-    for admissible_set in admissible_sets:
+    for admissible_set in admissibles:
         not_in_set = [elem for elem in baba.assumptions if elem not in admissible_set.elements]
-        contraries_to_derive = contraries(baba, not_in_set)
 
         # Not all assumptions have defined contraries (cannot be attacked)
-        if len(contraries_to_derive) != len(not_in_set):
+        if not all(elem in baba.contraries for elem in not_in_set):
             continue
 
-        if all([derivable(baba, contrary, admissible_set.elements) for contrary in contraries_to_derive]):
+        derived = derived_sentences(baba, admissible_set.elements)
+        if all([baba.contraries[elem].contrary in derived for elem in not_in_set]):
             stable_sets.append(admissible_set)
+            if first_only:
+                break
 
     return stable_sets
 
+
+# Returns whether the BABA framework has a stable set (in the current random variable world)
+def has_stable_set(baba):
+    return len(stable(baba, first_only=True)) > 0
+
+
+# Searches for stable sets by assigning assumptions in or out of the set, backtracking on failure.
+# Every assumption assigned out must be attacked by the final in set, so after each assignment:
+#  - assumptions attacked by the in set are assigned out (the in set must stay conflict free),
+#  - assumptions without a contrary are assigned in (they cannot be attacked),
+#  - the branch fails if an out assumption has no valid attack left whose support avoids the out set.
+# Yields the stable masks
+def extend_stable(bitset, in_mask, out_mask, deadline=None):
+    if deadline is not None and time.monotonic() > deadline:
+        return
+    assignment = propagate_stable(bitset, in_mask, out_mask)
+    if assignment is None:
+        return
+    in_mask, out_mask = assignment
+
+    undecided = bitset.all & ~(in_mask | out_mask)
+    if undecided == 0:
+        if bitset.attacked(in_mask) | in_mask == bitset.all and bitset.is_admissible(in_mask):
+            yield in_mask
+        return
+
+    next_assumption = undecided & -undecided  # Lowest undecided assumption
+    yield from extend_stable(bitset, in_mask | next_assumption, out_mask, deadline)
+    yield from extend_stable(bitset, in_mask, out_mask | next_assumption, deadline)
+
+
+# Applies the stable set constraints until nothing changes.
+# Returns the extended (in_mask, out_mask) or None if the assignment cannot be stable
+def propagate_stable(bitset, in_mask, out_mask):
+    while True:
+        attacked = bitset.attacked(in_mask)
+        if attacked & in_mask:
+            return None
+
+        forced_out = attacked & ~out_mask
+        forced_in = bitset.all & ~bitset.contrary_mask & ~in_mask
+        if forced_in & out_mask:
+            return None
+
+        for index in bitset.indices(out_mask):
+            if all(support & out_mask for support in bitset.attacks[index]):
+                return None
+
+        if forced_out == 0 and forced_in == 0:
+            return in_mask, out_mask
+        in_mask |= forced_in
+        out_mask |= forced_out
+
+############################################################
+# Lazy extension iterators: the extensions are yielded one by one as the searches find them, so
+# memory does not grow with the number of extensions. Iteration stops after 'limit' extensions or
+# once 'timeout' seconds have passed (the search itself is abandoned at the deadline)
+
+def iter_admissible(baba, limit=None, timeout=None):
+    bitset = baba.bitset()
+    return iter_semantic_sets(bitset, extend_admissible(bitset, 0, 0, deadline_after(timeout)), limit)
+
+
+def iter_complete(baba, limit=None, timeout=None):
+    bitset = baba.bitset()
+    return iter_semantic_sets(bitset, extend_complete(bitset, 0, 0, deadline_after(timeout)), limit)
+
+
+def iter_preferred(baba, limit=None, timeout=None):
+    bitset = baba.bitset()
+    return iter_semantic_sets(bitset, extend_preferred(bitset, 0, 0, [], deadline_after(timeout)), limit)
+
+
+def iter_stable(baba, limit=None, timeout=None):
+    bitset = baba.bitset()
+    return iter_semantic_sets(bitset, extend_stable(bitset, 0, 0, deadline_after(timeout)), limit)
+
+
+def iter_semantic_sets(bitset, masks, limit=None):
+    for mask in itertools.islice(masks, limit):
+        yield bitset.semantic_set(mask)
+
+
+# Returns the time.monotonic() deadline 'timeout' seconds from now (None if no timeout)
+def deadline_after(timeout):
+    return time.monotonic() + timeout if timeout is not None else None
+
+############################################################
+# Acceptance queries: whether all the given sentences are derivable from some (credulous)
+# or every (sceptical) extension of a semantics. The extensions are searched for lazily and the
+# search stops at the first witness (credulous) or counterexample (sceptical)
+
+def accepted_grounded(baba, sentences):
+    validate_query(baba, sentences)
+    return derives(baba, grounded_extension(baba).elements, sentences)
+
+
+# Every admissible set is contained in a preferred set, so (derivability being monotone)
+# credulous acceptance coincides for the admissible and preferred semantics
+def credulously_accepted_preferred(baba, sentences):
+    validate_query(baba, sentences)
+    bitset = baba.bitset()
+    return any(derives(baba, bitset.sentences(mask), sentences) for mask in extend_preferred(bitset, 0, 0, []))
+
+
+def sceptically_accepted_preferred(baba, sentences):
+    validate_query(baba, sentences)
+    bitset = baba.bitset()
+    return all(derives(baba, bitset.sentences(mask), sentences) for mask in extend_preferred(bitset, 0, 0, []))
+
+
+# (Preferred sets need not be complete: is_admissible() ignores the attacks that cannot be counter
+# attacked, which still keep an assumption from being defended)
+def credulously_accepted_complete(baba, sentences):
+    validate_query(baba, sentences)
+    bitset = baba.bitset()
+    return any(derives(baba, bitset.sentences(mask), sentences) for mask in extend_complete(bitset, 0, 0))
+
+
+# The grounded extension is the least complete set
+def sceptically_accepted_complete(baba, sentences):
+    return accepted_grounded(baba, sentences)
+
+
+def credulously_accepted_stable(baba, sentences):
+    validate_query(baba, sentences)
+    bitset = baba.bitset()
+    return any(derives(baba, bitset.sentences(mask), sentences) for mask in extend_stable(bitset, 0, 0))
+
+
+# (Trivially true if the framework has no stable sets)
+def sceptically_accepted_stable(baba, sentences):
+    validate_query(baba, sentences)
+    bitset = baba.bitset()
+    return all(derives(baba, bitset.sentences(mask), sentences) for mask in extend_stable(bitset, 0, 0))
+
+
+# Returns whether all the sentences are derivable from the set of assumptions
+def derives(baba, assumptions, sentences):
+    return all(derivable(baba, sentence, assumptions) for sentence in sentences)
+
+
+def validate_query(baba, sentences):
+    if not all([s in baba.language for s in sentences]):
+        raise InvalidBABAException("Acceptance enquired for invalid set of sentences")
+
 ############################################################
 
 
 # Definition of BABA semantics: acceptance probability
 # of a set of sentences (w.r.t. to a given semantics)
 def semantic_probability(semantics, baba, sentences):
-    if not all([s in baba.language for s in sentences]):
-        raise InvalidBABAException("Semantic probability enquired for invalid set of sentences")
-
-    worlds = generate_worlds(baba.random_variables)
-    acceptability_probability = 0.0
+    return semantic_probabilities(semantics, baba, [sentences])[0]
 
-    for world in worlds:
-        baba.set_random_variable_world(world)
 
-        if semantics == GROUNDED:
-            semantic_sets = grounded(baba)
-        elif semantics == SCEPTICALLY_PREFERRED:
-            semantic_sets = sceptically_preferred(baba)
-        elif semantics == IDEAL:
-            semantic_sets = ideal(baba)
-        else:
-            raise InvalidSemanticsException("Invalid semantics chosen: " + str(semantics))
+# Returns the acceptance probability of each of the given sets of sentences, in one pass over the worlds
+# (each world's extensions are computed once and all the queries are evaluated against them)
+def semantic_probabilities(semantics, baba, queries):
+    for sentences in queries:
+        if not all([s in baba.language for s in sentences]):
+            raise InvalidBABAException("Semantic probability enquired for invalid set of sentences")
+    validate_semantics([semantics])
 
-        can_derive_sentence = False
+    queried = list(dict.fromkeys([s for sentences in queries for s in sentences]))
+    table = world_table(baba, world_random_variables(baba, queried))
+    worlds = gray_code_worlds(baba, table) if len(baba.random_variables) > 0 else []
+    cache = AcceptanceCache(baba, [semantics], queried)
+    accepted_queries = {}  # accepted sentences : indices of the queries they satisfy
+    acceptability_probabilities = [0.0] * len(queries)
 
-        for a_set in semantic_sets:
-            can_derive_sentence = all([derivable(baba, s, a_set.elements) for s in sentences])
+    for index, world in worlds:
+        accepted = frozenset(cache.accepted(world)[semantics])
+        if accepted not in accepted_queries:
+            accepted_queries[accepted] = [position for position, sentences in enumerate(queries)
+                                          if all([s in accepted for s in sentences])]
 
-        if can_derive_sentence:
-            acceptability_probability += baba.BN.p_world(world)
+        for position in accepted_queries[accepted]:
+            acceptability_probabilities[position] += table.p(index)
 
-    return acceptability_probability
+    return acceptability_probabilities
 
 
 # Returns a dictionary of {symbol : semantic probability}
 def compute_semantic_probability(semantics, baba):
-    language_probability = {}
-    for sentence in baba.language:
-        language_probability[sentence.symbol] = 0.0
-
-    worlds = generate_worlds(baba.random_variables)
-    worlds = [[]] if len(worlds) == 0 else worlds
+    return compute_semantic_probability_tables(baba, [semantics])[semantics]
+
+
+# Returns a dictionary of {semantics : {symbol : semantic probability}} for all the given semantics,
+# computed in a single pass over the random variable worlds
+def compute_semantic_probability_tables(baba, semantics_list):
+    validate_semantics(semantics_list)
+
+    tables = {}
+    for semantics in semantics_list:
+        tables[semantics] = dict([(sentence.symbol, 0.0) for sentence in baba.language])
+
+    # Random variables that no rule depends on are accepted exactly in the worlds where they hold
+    enumerated, informational = language_random_variables(baba)
+    for sentence in informational:
+        probability = baba.BN.marginal(sentence)
+        for semantics in semantics_list:
+            tables[semantics][sentence.symbol] += probability
+
+    queried = [s for s in baba.language if s not in informational]
+    table = world_table(baba, enumerated)
+    cache = AcceptanceCache(baba, semantics_list, queried)
+
+    for index, world in gray_code_worlds(baba, table):
+        world_probability = table.p(index)
+        for semantics, accepted in cache.accepted(world).items():
+            for sentence in accepted:
+                tables[semantics][sentence.symbol] += world_probability
+
+    return tables
+
+
+# Anytime semantic probabilities: worlds are processed in descending order of probability and {symbol : (lower bound,
+# upper bound)} is generated after every batch of worlds. The lower bound is the probability accepted so far and the
+# upper bound adds the probability of the unprocessed worlds. Stops (after generating the last bounds) once every
+# bound is within epsilon, once 'timeout' seconds have passed, or after the last world, where the bounds meet
+def iter_semantic_probability_bounds(semantics, baba, epsilon=0.0, timeout=None, batch_size=64):
+    validate_semantics([semantics])
+    deadline = deadline_after(timeout)
+
+    enumerated, informational = language_random_variables(baba)
+    queried = [s for s in baba.language if s not in informational]
+    multiplicity = symbol_counts(queried)  # A symbol of several sentences can be accepted more than once per world
+    table = world_table(baba, enumerated)
+    cache = AcceptanceCache(baba, [semantics], queried)
+
+    lower = dict([(sentence.symbol, 0.0) for sentence in baba.language])
+    for sentence in informational:
+        lower[sentence.symbol] += baba.BN.marginal(sentence)
+
+    order = sorted(range(len(table)), key=table.p, reverse=True)
+    remaining = math.fsum(table.probabilities)
+
+    for position, index in enumerate(order):
+        world_probability = table.p(index)
+        for symbol, count in symbol_counts(cache.accepted(table.world(index))[semantics]).items():
+            lower[symbol] += count * world_probability
+
+        remaining = max(remaining - world_probability, 0.0) if position < len(order) - 1 else 0.0
+        stop = remaining == 0.0 or remaining * max(list(multiplicity.values()) + [0]) <= epsilon or \
+            (deadline is not None and time.monotonic() > deadline)
+
+        if stop or (position + 1) % batch_size == 0:
+            yield dict([(symbol, (probability, probability + remaining * multiplicity.get(symbol, 0)))
+                        for symbol, probability in lower.items()])
+        if stop:
+            return
+
+
+# Returns the table of the worlds over the given random variables (with a single empty world if there are none)
+def world_table(baba, random_variables):
+    return Bayesian.WorldTable(baba.BN, [rv.symbol for rv in random_variables])
+
+
+# Generates (index, world) for all the worlds of the table in Gray-code order, so that consecutive worlds differ
+# in a single random variable. Each world becomes the framework's world, and the framework's bitset is updated
+# in place: only the attacks whose support mentions the flipped random variable can change validity
+def gray_code_worlds(baba, table):
+    compiled = baba.compile()
+    world = table.world(0)
+    baba.set_random_variable_world(world)
+    bitset = baba.bitset()
+    world_ids = compiled.world_ids(world)
+
+    missing = array('i', [0] * len(compiled.attack_masks))  # support elements (other than assumptions) not in the world
+    valid_supports = []  # valid_supports[assumption index] = {support mask : number of valid attacks}
+    for index in range(len(compiled.assumptions)):
+        valid_supports.append({})
+        for attack in compiled.attacks_on(index):
+            for elem in compiled.outside_support(attack):
+                missing[attack] += elem not in world_ids
+            if missing[attack] == 0:
+                mask = compiled.attack_masks[attack]
+                valid_supports[index][mask] = valid_supports[index].get(mask, 0) + 1
+
+    yield 0, world
+
+    variable_count = len(table.random_variables)
+    for step in range(1, len(table)):
+        position = variable_count - 1 - ((step & -step).bit_length() - 1)  # The lowest set bit of step flips
+        removed = world[position]
+        added = Sentence(removed.symbol, random_variable=True, negation=not removed.negation)
+        world = world[:position] + [added] + world[position + 1:]
+
+        changed = set()
+        for attack in supporting_attacks(compiled, removed):
+            missing[attack] += 1
+            if missing[attack] == 1:
+                bitset.valid[attack] = 0
+                index, mask = compiled.attack_targets[attack], compiled.attack_masks[attack]
+                valid_supports[index][mask] -= 1
+                if valid_supports[index][mask] == 0:
+                    del valid_supports[index][mask]
+                changed.add(index)
+
+        for attack in supporting_attacks(compiled, added):
+            missing[attack] -= 1
+            if missing[attack] == 0:
+                bitset.valid[attack] = 1
+                index, mask = compiled.attack_targets[attack], compiled.attack_masks[attack]
+                valid_supports[index][mask] = valid_supports[index].get(mask, 0) + 1
+                changed.add(index)
+
+        for index in changed:
+            bitset.attacks[index] = sorted(valid_supports[index])
 
-    for world in worlds:
         baba.set_random_variable_world(world)
+        baba.bitset_world = frozenset(world)
+        yield step ^ (step >> 1), world
+
+
+# Returns the attacks whose support contains the random variable literal (none if it is not in the language)
+def supporting_attacks(compiled, literal):
+    return compiled.supporting_attacks(compiled.ids[literal]) if literal in compiled.ids else []
+
 
+# Returns the random variables whose worlds have to be enumerated to decide the acceptance of the
+# sentences: those the attacks or the derivations of the sentences depend on, and their ancestors in
+# the Bayesian network. Any other random variable marginalises out of the semantic probability
+def world_random_variables(baba, sentences):
+    symbols = relevant_random_variables(baba, sentences)
+    symbols = baba.BN.ancestral_closure(symbols) if len(symbols) > 0 else symbols
+    return [Sentence(symbol, random_variable=True) for symbol in sorted(symbols)]
+
+
+# Returns the symbols of the random variables reachable backwards through the rules
+# from the contraries of the assumptions or from the given sentences
+def relevant_random_variables(baba, sentences):
+    rules_by_head = {}
+    for rule in baba.rules:
+        rules_by_head.setdefault(rule.head, []).append(rule)
+
+    to_visit = [contrary.contrary for _, contrary in baba.contraries.items()] + list(sentences)
+    visited = set(to_visit)
+    while len(to_visit) > 0:
+        for rule in rules_by_head.get(to_visit.pop(), []):
+            for element in rule.body:
+                if element not in visited:
+                    visited.add(element)
+                    to_visit.append(element)
+
+    return set(sentence.symbol for sentence in visited if sentence.random_variable)
+
+
+# Returns the random variables the acceptance of the language depends on, and the
+# random variable sentences of the language that no rule depends on (informational)
+def language_random_variables(baba):
+    enumerated = world_random_variables(baba, [s for s in baba.language if not s.random_variable])
+    enumerated_symbols = set(rv.symbol for rv in enumerated)
+    informational = [s for s in baba.language if s.random_variable and s.symbol not in enumerated_symbols]
+    return enumerated, informational
+
+
+# Memoises the sentences accepted in each random variable world. A world only matters through the attacks it
+# makes valid and through its random variable facts that rules use (or that are queried), so worlds agreeing
+# on those share their extensions, which are computed once per set of valid attacks, and their accepted sentences
+class AcceptanceCache:
+    def __init__(self, baba, semantics_list, sentences):
+        self.baba = baba
+        self.semantics_list = semantics_list
+        self.sentences = list(sentences)
+        self.derivation_facts = set([element for rule in baba.rules for element in rule.body
+                                     if element.random_variable] + [s for s in sentences if s.random_variable])
+        self.extensions = {}  # valid attacks : {semantics : extensions}
+        self.accepted_sentences = {}  # (valid attacks, facts) : {semantics : accepted sentences}
+
+    # Returns {semantics : the given sentences accepted} in the world (which becomes the framework's world)
+    def accepted(self, world):
+        self.baba.set_random_variable_world(world)
+        attack_key = self.baba.bitset().attack_key()
+        key = (attack_key, frozenset([rv for rv in world if rv in self.derivation_facts]))
+
+        if key not in self.accepted_sentences:
+            if attack_key not in self.extensions:
+                self.extensions[attack_key] = world_extensions(self.baba, self.semantics_list)
+            self.accepted_sentences[key] = self.accepted_in_world(self.extensions[attack_key])
+
+        return self.accepted_sentences[key]
+
+    def accepted_in_world(self, extensions):
+        derived_sets = {}  # Extensions are often shared between semantics
+        accepted = {}
+        for semantics, semantic_sets in extensions.items():
+            for a_set in semantic_sets:
+                if a_set not in derived_sets:
+                    derived_sets[a_set] = derived_sentences(self.baba, a_set.elements)
+
+            semantic_derived_sets = [derived_sets[a_set] for a_set in semantic_sets]
+            accepted[semantics] = [sentence for sentence in self.sentences
+                                   if any(sentence in derived for derived in semantic_derived_sets)]
+
+        return accepted
+
+
+# Returns {semantics : extensions} in the current random variable world. The preferred sets,
+# from which both the sceptically preferred and the ideal extensions are computed, are searched once
+def world_extensions(baba, semantics_list):
+    validate_semantics(semantics_list)
+    bitset = baba.bitset()
+    preferred_intersection = None
+    extensions = {}
+
+    for semantics in semantics_list:
         if semantics == GROUNDED:
-            semantic_sets = grounded(baba)
-        elif semantics == SCEPTICALLY_PREFERRED:
-            semantic_sets = sceptically_preferred(baba)
-        elif semantics == IDEAL:
-            semantic_sets = ideal(baba)
+            extensions[semantics] = [grounded_extension(baba)]
+            continue
+
+        if preferred_intersection is None:
+            preferred_intersection = preferred_intersection_mask(baba)
+
+        if semantics == SCEPTICALLY_PREFERRED:
+            extensions[semantics] = [bitset.semantic_set(preferred_intersection)]
         else:
-            raise InvalidSemanticsException("Invalid semantics chosen: " + str(semantics))
+            extensions[semantics] = [ideal_extension(baba, preferred_intersection)]
 
-        world_probability = baba.BN.p_world(world) if len(world) > 0 else 1.0
+    return extensions
 
-        for sentence in baba.language:
-            if any(derivable(baba, sentence, a_set.elements) for a_set in semantic_sets):
-                language_probability[sentence.symbol] += world_probability
 
-    return language_probability
+def validate_semantics(semantics_list):
+    for semantics in semantics_list:
+        if semantics not in [GROUNDED, SCEPTICALLY_PREFERRED, IDEAL]:
+            raise InvalidSemanticsException("Invalid semantics chosen: " + str(semantics))
 
 
-# Returns semantic probabilities for a BABA framework for given semantics
-def compute_semantic_probabilities_for_semantics(baba, semantics):
-    probabilities = compute_semantic_probability(semantics, baba)
+# Returns the probabilities as a sorted list of (symbol, probability string) tuples
+def probability_tuples(probabilities):
     tuples = [(sentence, "{0:.3f}".format(probability)) for sentence, probability in probabilities.items()]
-    tuples = sorted(tuples, key=lambda item: item[0])
+    return sorted(tuples, key=lambda item: item[0])
+
 
-    return tuples
+# Returns semantic probabilities for a BABA framework for given semantics
+def compute_semantic_probabilities_for_semantics(baba, semantics):
+    return probability_tuples(compute_semantic_probability(semantics, baba))
 
 
 # Returns a tuple of the semantic probabilities for a BABA
 # (probabilities given as lists of (sentence, probability) string tuple
 def compute_semantic_probabilities(baba):
-    grounded_tuples = compute_semantic_probabilities_for_semantics(baba, GROUNDED)
-    s_preferred_tuples = compute_semantic_probabilities_for_semantics(baba, SCEPTICALLY_PREFERRED)
-    ideal_tuples = compute_semantic_probabilities_for_semantics(baba, IDEAL)
+    tables = compute_semantic_probability_tables(baba, [GROUNDED, SCEPTICALLY_PREFERRED, IDEAL])
+
+    grounded_tuples = probability_tuples(tables[GROUNDED])
+    s_preferred_tuples = probability_tuples(tables[SCEPTICALLY_PREFERRED])
+    ideal_tuples = probability_tuples(tables[IDEAL])
 
     return grounded_tuples, s_preferred_tuples, ideal_tuples
 
 
-##############################################################################
-# Computes the semantic probability in parallel
-def compute_parallel_semantic_probability(semantics, baba):
-    output = mp.Queue()
+# Estimates the semantic probabilities by Monte Carlo sampling of the random variable worlds, for frameworks
+# with too many random variables to enumerate. Worlds are drawn from the Bayesian network in batches until
+# every standard error is within the precision or the sample budget is spent. A seed makes the run reproducible
+# Returns a dictionary of {symbol : (estimated semantic probability, standard error)}
+def estimate_semantic_probability(semantics, baba, precision=0.01, max_samples=100000, batch_size=1000, seed=None):
+    validate_semantics([semantics])
+    generator = random.Random(seed)
 
-    language_probability = {}
-    for sentence in baba.language:
-        language_probability[sentence.symbol] = 0.0
+    enumerated, informational = language_random_variables(baba)
+    queried = [s for s in baba.language if s not in informational]
+    order = baba.BN.topological_order([rv.symbol for rv in enumerated]) if len(enumerated) > 0 else []
+
+    totals = dict([(sentence.symbol, 0.0) for sentence in queried])
+    squares = dict(totals)
+    cache = AcceptanceCache(baba, [semantics], queried)  # Sampled worlds repeat
+    samples = 0
+
+    while samples < max_samples:
+        for _ in range(min(batch_size, max_samples - samples)):
+            world = baba.BN.sample_world(generator, order) if len(order) > 0 else []
+            for symbol, count in symbol_counts(cache.accepted(world)[semantics]).items():
+                totals[symbol] += count
+                squares[symbol] += count * count
+            samples += 1
+
+        errors = [standard_error(totals[symbol], squares[symbol], samples) for symbol in totals]
+        if max(errors + [0.0]) <= precision:
+            break
 
-    worlds = generate_worlds(baba.random_variables)
-    worlds = [[]] if len(worlds) == 0 else worlds
+    estimates = dict([(symbol, (totals[symbol] / samples, standard_error(totals[symbol], squares[symbol], samples)))
+                      for symbol in totals])
+    for sentence in informational:
+        probability, _ = estimates.get(sentence.symbol, (0.0, 0.0))
+        estimates[sentence.symbol] = (probability + baba.BN.marginal(sentence), 0.0)
+
+    return estimates
+
+
+# Returns {symbol : number of the sentences with that symbol}
+def symbol_counts(sentences):
+    counts = {}
+    for sentence in sentences:
+        counts[sentence.symbol] = counts.get(sentence.symbol, 0) + 1
 
-    # Setup processes
-    processes = [mp.Process(target=compute_parallel_semantic_probability_for_world,
-                            args=(copy.deepcopy(baba), semantics, world, output))
-                 for world in worlds]
+    return counts
 
-    # Run processes
-    for p in processes:
-        p.start()
 
-    # Exit the completed processes
-    for p in processes:
-        p.join()
+# Returns the standard error of the mean of a sample, given its sum and sum of squares
+def standard_error(total, squares, samples):
+    mean = total / samples
+    return math.sqrt(max(squares / samples - mean * mean, 0.0) / samples)
 
-    # Get process results from the output queue
-    results = [output.get() for p in processes]
 
-    # Sum marginal probabilities
+##############################################################################
+# Computes the semantic probability in parallel. A fixed-size pool of worker processes (by default one per CPU)
+# receives the framework once and evaluates contiguous chunks of world indices, returning partial probability sums
+def compute_parallel_semantic_probability(semantics, baba, processes=None):
+    validate_semantics([semantics])
+    processes = mp.cpu_count() if processes is None else processes
+
+    enumerated, informational = language_random_variables(baba)
+    queried = [s for s in baba.language if s not in informational]
+    table = world_table(baba, enumerated)
+    world_count = len(table)
+    chunk_size = -(-world_count // processes)
+    chunks = [(start, min(start + chunk_size, world_count)) for start in range(0, world_count, chunk_size)]
+
+    with mp.Pool(processes=len(chunks), initializer=initialise_parallel_worker,
+                 initargs=(baba, semantics, table, queried)) as pool:
+        results = pool.map(compute_parallel_semantic_probability_for_worlds, chunks)
+
+    language_probability = dict([(sentence.symbol, 0.0) for sentence in baba.language])
+
+    # Sum partial probabilities
     for probability_dictionary in results:
         for key, value in probability_dictionary.items():
             language_probability[key] += value
 
+    for sentence in informational:
+        language_probability[sentence.symbol] += baba.BN.marginal(sentence)
+
     return language_probability
 
 
-def compute_parallel_semantic_probability_for_world(baba, semantics, world, output):
-    language_probability = {}
-    baba.set_random_variable_world(world)
+# State of a parallel worker process: (semantics, world table, acceptance cache)
+parallel_worker_state = None
 
-    if semantics == GROUNDED:
-        semantic_sets = grounded(baba)
-    elif semantics == SCEPTICALLY_PREFERRED:
-        semantic_sets = sceptically_preferred(baba)
-    elif semantics == IDEAL:
-        semantic_sets = ideal(baba)
-    else:
-        raise InvalidSemanticsException("Invalid semantics chosen: " + str(semantics))
 
-    world_probability = baba.BN.p_world(world)
+def initialise_parallel_worker(baba, semantics, table, sentences):
+    global parallel_worker_state
+    parallel_worker_state = (semantics, table, AcceptanceCache(baba, [semantics], sentences))
 
-    for sentence in baba.language:
-        if any(derivable(baba, sentence, a_set.elements) for a_set in semantic_sets):
-            language_probability[sentence.symbol] = world_probability
 
-    output.put(language_probability)
+# Returns the partial {symbol : probability} sums over the worlds with indices in [start, end)
+def compute_parallel_semantic_probability_for_worlds(chunk):
+    semantics, table, cache = parallel_worker_state
+    start, end = chunk
+    language_probability = {}
+
+    for index in range(start, end):
+        world_probability = table.p(index)
+        for symbol, count in symbol_counts(cache.accepted(table.world(index))[semantics]).items():
+            language_probability[symbol] = language_probability.get(symbol, 0.0) + count * world_probability
+
+    return language_probability
@@ -1,4 +1,3 @@
-import collections
 import itertools
 
 from PythonSemantics import Semantics
@@ -55,28 +54,39 @@ def minimal_set(semantic_sets):
     return minimal_sets
 
 
-# Returns all the possible worlds created with the given random variables
-def generate_worlds(random_variables):
-    worlds = []
+# Returns the given frozensets without duplicates and without those subsumed by a subset of them (keeping
+# the order in which they first appear among those of the same size). A subset only subsumes a set that
+# is not counterable when it is not counterable itself
+def minimal_supports(supports, counterable=lambda support: True):
+    minimal = []
+    for support in sorted(dict.fromkeys(supports), key=len):
+        if not any([other <= support and (counterable(other) or not counterable(support)) for other in minimal]):
+            minimal.append(support)
+
+    return minimal
 
-    for rv in random_variables:
-        pos = Semantics.Sentence(rv.symbol, random_variable=True)
-        neg = Semantics.Sentence(rv.symbol, random_variable=True, negation=True)\
 
-        possible_world = [pos, neg]
-        if len(worlds) == 0:
-            worlds = [[pos], [neg]]
-            continue
+# Returns the minimal unions of one support from each of the given lists of supports
+def support_combinations(first_supports, second_supports, counterable=lambda support: True):
+    return minimal_supports([first | second for first in first_supports for second in second_supports],
+                            counterable)
 
-        worlds = list(itertools.product(worlds, possible_world))
-        worlds = [flatten(list(world)) for world in worlds]
 
-    return worlds
+# Returns all the possible worlds created with the given random variables
+def generate_worlds(random_variables):
+    random_variables = list(random_variables)
+    if len(random_variables) == 0:
+        return []
+
+    return [world_from_index(random_variables, index) for index in range(2 ** len(random_variables))]
 
 
-def flatten(items):
-    return [elem for item in items for elem in flatten(item)] \
-        if isinstance(items, collections.Iterable) else [items]
+# Returns the world with the given index in the order of generate_worlds(random_variables)
+# (the first random variable is the most significant bit, a set bit meaning a negation)
+def world_from_index(random_variables, index):
+    count = len(random_variables)
+    return [Semantics.Sentence(rv.symbol, random_variable=True, negation=bool(index >> (count - 1 - position) & 1))
+            for position, rv in enumerate(random_variables)]
 
 
 # Creates a list of strings representing a list of (SemanticSet, derivation set) tuples
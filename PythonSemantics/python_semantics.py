@@ -6,13 +6,15 @@ def create_framework(framework_string):
     return Parser.BABAProgramParser(string=framework_string).parse()
 
 
-def compute_semantics(framework_string):
+# labelling: compute the complete sets with the labelling engine instead of the admissible sets
+def compute_semantics(framework_string, labelling=False):
     framework = create_framework(framework_string)
 
     admissible = Semantics.admissible(framework)
     stable_ext = Semantics.stable(framework, admissibles=admissible)
     grounded_ext = Semantics.grounded(framework, admissibles=admissible)
-    complete_ext = Semantics.complete(framework, admissibles=admissible)
+    complete_ext = Semantics.complete(framework) if labelling else \
+        Semantics.complete(framework, admissibles=admissible)
     preferred_ext = Semantics.preferred(framework, admissibles=admissible)
     ideal_ext = Semantics.stable(framework, admissibles=admissible)
 
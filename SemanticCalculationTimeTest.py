@@ -37,9 +37,13 @@ for file in files:
     grounded_time = calculate_average_execution_time(Semantics.grounded, baba, 10)
     print('Grounded: ' + str(grounded_time))
 
-    complete_time = calculate_average_execution_time(Semantics.complete, baba, 10)
+    complete_time = calculate_average_execution_time(
+        lambda framework: Semantics.complete(framework, admissibles=Semantics.admissible(framework)), baba, 10)
     print('Complete: ' + str(complete_time))
 
+    complete_labelling_time = calculate_average_execution_time(Semantics.complete, baba, 10)
+    print('Complete (labelling): ' + str(complete_labelling_time))
+
     preferred_time = calculate_average_execution_time(Semantics.preferred, baba, 10)
     print('Preferred: ' + str(preferred_time))
 
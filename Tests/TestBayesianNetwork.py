@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from PythonSemantics import Semantics, Bayesian
@@ -109,3 +110,78 @@ class TestBayesianNetwork(unittest.TestCase):
         self.assertAlmostEqual(0.096, baysnet.p_world([a, b_neg, c_neg]))
         self.assertAlmostEqual(0.098, baysnet.p_world([a_neg, b, c]))
         self.assertAlmostEqual(0.144, baysnet.p_world([a_neg, b_neg, c_neg]))
+
+    def test_ancestral_closure(self):
+        cp = Bayesian.ConditionalProbability(a, [b], {"b": 0.3, "~b": 0.6})
+        baysnet = Bayesian.BayesianNetwork({'a': cp, 'b': 0.7, 'c': 0.2})
+        self.assertEqual(['b'], baysnet.parents('a'))
+        self.assertEqual([], baysnet.parents('b'))
+        self.assertEqual({'a', 'b'}, baysnet.ancestral_closure(['a']))
+        self.assertEqual({'b', 'c'}, baysnet.ancestral_closure(['b', 'c']))
+
+    def test_marginal(self):
+        cp_map = {"bc": 0.3, "b~c": 0.6, "~bc": 0.5, "~b~c": 0.4}
+        cp = Bayesian.ConditionalProbability(a, [b, c], cp_map)
+        baysnet = Bayesian.BayesianNetwork({'a': cp, 'b': 0.7, 'c': 0.2})
+        self.assertAlmostEqual(0.7, baysnet.marginal(b))
+        self.assertAlmostEqual(0.042 + 0.336 + 0.03 + 0.096, baysnet.marginal(a))
+        self.assertAlmostEqual(1 - (0.042 + 0.336 + 0.03 + 0.096), baysnet.marginal(a_neg))
+
+    def test_topological_order(self):
+        cp = Bayesian.ConditionalProbability(a, [b, c], {"bc": 0.3, "b~c": 0.6, "~bc": 0.5, "~b~c": 0.4})
+        baysnet = Bayesian.BayesianNetwork({'a': cp, 'b': 0.7, 'c': 0.2})
+        self.assertEqual(['b', 'c', 'a'], baysnet.topological_order(['a']))
+        self.assertEqual(['b', 'c'], baysnet.topological_order(['c', 'b']))
+
+    def test_sample_world(self):
+        cp = Bayesian.ConditionalProbability(a, [b], {"b": 1.0, "~b": 0.0})
+        baysnet = Bayesian.BayesianNetwork({'a': cp, 'b': 0.7})
+        generator = random.Random(0)
+        for _ in range(20):
+            world = baysnet.sample_world(generator, ['b', 'a'])
+            self.assertEqual(['b', 'a'], [rv.symbol for rv in world])
+            self.assertEqual(world[0].negation, world[1].negation)
+
+    def test_compiled_network(self):
+        cp_map = {"bc": 0.3, "b~c": 0.6, "~bc": 0.5, "~b~c": 0.4}
+        cp = Bayesian.ConditionalProbability(a, [b, c], cp_map)
+        baysnet = Bayesian.BayesianNetwork({'a': cp, 'b': 0.7, 'c': 0.2})
+        compiled = baysnet.compile()
+        self.assertIs(compiled, baysnet.compile())
+        self.assertEqual(['b', 'c', 'a'], compiled.symbols)
+        self.assertEqual([0.4, 0.6, 0.5, 0.3], list(compiled.tables[compiled.positions['a']]))
+
+        worlds = [[a, b, c_neg], [a, b_neg, c_neg], [a_neg, b, c], [b, c, a_neg]]
+        probabilities = baysnet.p_worlds(worlds)
+        for world, probability in zip(worlds, probabilities):
+            self.assertAlmostEqual(baysnet.p_world(world), probability)
+        self.assertAlmostEqual(0.098, probabilities[3])
+
+    def test_compiled_network_raises_exception_for_missing_parent(self):
+        cp = Bayesian.ConditionalProbability(a, [b], {"b": 0.3, "~b": 0.6})
+        baysnet = Bayesian.BayesianNetwork({'a': cp, 'b': 0.7})
+        self.assertRaises(Bayesian.InvalidConditionalProbabilityException, baysnet.p_world, [a])
+        self.assertRaises(Bayesian.InvalidRandomVariableWorldException, baysnet.p_worlds, [[a, b], [a, c]])
+
+    def test_world_table(self):
+        cp_map = {"bc": 0.3, "b~c": 0.6, "~bc": 0.5, "~b~c": 0.4}
+        cp = Bayesian.ConditionalProbability(a, [b, c], cp_map)
+        baysnet = Bayesian.BayesianNetwork({'a': cp, 'b': 0.7, 'c': 0.2, 'd': 0.1})
+        table = Bayesian.WorldTable(baysnet, ['a', 'c', 'b'])
+        self.assertEqual(['b', 'c', 'a'], table.symbols)
+        self.assertEqual(8, len(table))
+        self.assertEqual([b, c_neg, a], table.world(2))
+        self.assertAlmostEqual(0.336, table.p(2))
+        for index in range(len(table)):
+            self.assertAlmostEqual(baysnet.p_world(table.world(index)), table.p(index))
+        self.assertAlmostEqual(1.0, sum(table.probabilities))
+
+        empty_table = Bayesian.WorldTable(None, [])
+        self.assertEqual(1, len(empty_table))
+        self.assertEqual([], empty_table.world(0))
+        self.assertEqual(1.0, empty_table.p(0))
+
+    def test_world_table_requires_ancestors(self):
+        cp = Bayesian.ConditionalProbability(a, [b], {"b": 0.3, "~b": 0.6})
+        baysnet = Bayesian.BayesianNetwork({'a': cp, 'b': 0.7})
+        self.assertRaises(Bayesian.InvalidConditionalProbabilityException, baysnet.compile().world_probabilities, ['a'])
@@ -57,4 +57,18 @@ class TestIntegration(unittest.TestCase):
     def test_integration_cow_framework(self):
         baba = Parser.BABAProgramParser(filename='../PythonSemantics/Parsing/BABA_cow_program').parse()
         lang_prob = Semantics.compute_semantic_probability(Semantics.GROUNDED, baba)
-        self.assertAlmostEqual(0.72, lang_prob[ExampleFrameworks.HP.symbol])
\ No newline at end of file
+        self.assertAlmostEqual(0.72, lang_prob[ExampleFrameworks.HP.symbol])
+
+    def test_integration_sceptically_preferred_and_ideal_probabilities(self):
+        cow_baba = Parser.BABAProgramParser(filename='../PythonSemantics/Parsing/BABA_cow_program').parse()
+        baba_5 = Parser.BABAProgramParser(filename='../PythonSemantics/Parsing/BABA_program_5').parse()
+        for semantics in [Semantics.SCEPTICALLY_PREFERRED, Semantics.IDEAL]:
+            lang_prob = Semantics.compute_semantic_probability(semantics, cow_baba)
+            self.assertAlmostEqual(0.72, lang_prob[ExampleFrameworks.HP.symbol])
+            self.assertAlmostEqual(0.2, lang_prob[ExampleFrameworks.not_CCA.symbol])
+            self.assertAlmostEqual(0.9, lang_prob[ExampleFrameworks.not_FM.symbol])
+
+            lang_prob = Semantics.compute_semantic_probability(semantics, baba_5)
+            self.assertAlmostEqual(0.2, lang_prob[ExampleFrameworks.a.symbol])
+            self.assertAlmostEqual(0.8, lang_prob[ExampleFrameworks.b.symbol])
+            self.assertAlmostEqual(0.8, lang_prob[ExampleFrameworks._a.symbol])
@@ -1,6 +1,6 @@
 import unittest
 
-from PythonSemantics import ExampleFrameworks, Semantics
+from PythonSemantics import ExampleFrameworks, Semantics, SemanticsUtils
 
 a = Semantics.Sentence('a')
 b = Semantics.Sentence('b')
@@ -17,6 +17,10 @@ larger_baba = ExampleFrameworks.larger_framework()
 venice_baba = ExampleFrameworks.venice_framework()
 s_baba = ExampleFrameworks.s_framework()
 
+# Frameworks on which the semantics engines are checked against their reference definitions
+reference_babas = [venice_baba, s_baba, larger_baba, ExampleFrameworks.ideal_framework(),
+                   ExampleFrameworks.cow_framework(), ExampleFrameworks.with_contraries()]
+
 
 class TestSemantics(unittest.TestCase):
 
@@ -118,6 +122,35 @@ class TestSemantics(unittest.TestCase):
         self.assertTrue(all([element in Semantics.derivable_set(baba, [a, d]) for element in [a, d]]))
         self.assertEqual(2, len(Semantics.derivable_set(baba, [a, d])))
 
+    def test_closure(self):
+        baba = ExampleFrameworks.with_chaining()
+        self.assertEqual(set([a, b, c, d, e, f, g]), baba.closure([b, d, f]))
+        self.assertEqual(set([a, b, c, g]), baba.closure([b, c]))
+        self.assertEqual(set([c, d, e, f, g]), baba.closure([d, f]))
+        self.assertEqual(set(), baba.closure([]))
+
+    def test_closure_with_empty_body_rules(self):
+        baba = ExampleFrameworks.cow_framework()
+        self.assertEqual(set([ExampleFrameworks.HOC]), baba.closure([]))
+        self.assertIn(ExampleFrameworks.FM, baba.closure([ExampleFrameworks.CM]))
+
+    def test_compiled_framework(self):
+        compiled = ExampleFrameworks.larger_framework().compile()
+        self.assertEqual((a, b, c, d, e, f, g, h, i, j), compiled.sentences)
+        self.assertEqual((b, e, f, g, h, i), compiled.assumptions)
+        self.assertEqual(compiled.ids[c], compiled.contrary[compiled.ids[b]])
+        self.assertEqual(-1, compiled.contrary[compiled.ids[e]])
+
+        rule = list(compiled.heads).index(compiled.ids[c])
+        body = compiled.body_ids[compiled.body_offsets[rule]:compiled.body_offsets[rule + 1]]
+        self.assertEqual([compiled.ids[d], compiled.ids[e], compiled.ids[f]], list(body))
+        self.assertEqual([compiled.heads[compiled.facts[0]]], [compiled.ids[j]])
+
+        attack_masks = sorted([compiled.attack_masks[attack] for attack in compiled.attacks_on(0)])
+        self.assertEqual([0, 0b000110, 0b011110, 0b100110], attack_masks)
+        self.assertEqual([], list(compiled.attacks_on(1)))
+        self.assertEqual(set([a, b, j]), compiled.closure([b]))
+
     def test_defends(self):
         self.assertTrue(Semantics.defends(venice_baba, [e, c], a))
         self.assertTrue(Semantics.defends(venice_baba, [c], a))
@@ -155,6 +188,15 @@ class TestSemantics(unittest.TestCase):
         self.assertFalse(Semantics.conflict_free(baba, [d, e, h, i]), "Expected: NOT conflict free")
         self.assertFalse(Semantics.conflict_free(baba, [d, e, f, g, h, i]), "Expected: NOT conflict free")
 
+    # Every way of checking conflicts uses the random variable world (adding sentences keeps a set conflicting)
+    def test_conflict_free_follows_random_variable_world(self):
+        baba = ExampleFrameworks.cow_framework()
+        baba.set_random_variable_world([ExampleFrameworks.CM])
+        not_FM = ExampleFrameworks.not_FM
+        self.assertFalse(Semantics.conflict_free(baba, [not_FM]))
+        self.assertFalse(Semantics.conflict_free(baba, [not_FM, ExampleFrameworks.HOC]))
+        self.assertFalse(Semantics.conflict_free(baba, [not_FM], Semantics.get_attacks(baba, [not_FM])))
+
     def test_conflict_free_larger_framework(self):
         baba = ExampleFrameworks.larger_framework()
         self.assertTrue(Semantics.conflict_free(baba, []), "Expected: conflict free")
@@ -286,20 +328,134 @@ class TestSemantics(unittest.TestCase):
     def test_required_to_derive(self):
         baba = ExampleFrameworks.larger_framework()
         required_to_derive_a = baba.compute_required_to_derive(a)
-        self.assertIn([b], required_to_derive_a)
-        self.assertIn([e, f], required_to_derive_a)
+        self.assertIn(frozenset([b]), required_to_derive_a)
+        self.assertIn(frozenset([e, f]), required_to_derive_a)
         self.assertEqual(3, len(required_to_derive_a))
 
-        self.assertEqual(1, len(baba.compute_required_to_derive(j)))
+        self.assertEqual([frozenset()], baba.compute_required_to_derive(j))
 
         required_to_derive_c = baba.compute_required_to_derive(c)
-        self.assertEqual(5, len(required_to_derive_c))
-        first_derivation = required_to_derive_c[0]
-        second_derivation = required_to_derive_c[1]
-        all(self.assertIn(element, first_derivation) or self.assertIn(element, second_derivation)
-            for element in [e, f, g, h])
-        all(self.assertIn(element, first_derivation) or self.assertIn(element, second_derivation)
-            for element in [e, f, i])
+        self.assertEqual(4, len(required_to_derive_c))
+        self.assertEqual(set([frozenset([c]), frozenset([d, e, f]), frozenset([e, f, g, h]), frozenset([e, f, i])]),
+                         set(required_to_derive_c))
+
+    def test_required_to_derive_minimal(self):
+        _b = Semantics.Sentence('_b')
+        rules = [Semantics.Rule(d, [a]), Semantics.Rule(d, [a, b]), Semantics.Rule(d, [a, c]),
+                 Semantics.Rule(e, [d, a]), Semantics.Rule(_b, [e])]
+        contraries = {a: Semantics.Contrary(a, _b), b: Semantics.Contrary(b, _b)}
+        baba = Semantics.BABA([a, b, c, d, e, _b], rules, [a, b, c], contraries, [], None)
+
+        self.assertEqual(set([frozenset([d]), frozenset([a])]), set(baba.compute_required_to_derive(d)))
+        self.assertEqual(set([frozenset([e]), frozenset([a])]), set(baba.compute_required_to_derive(e)))
+
+        # {c} cannot be counter-attacked, {b, c} can be (through b), so {c} does not subsume it
+        baba.add_rule(Semantics.Rule(_b, [c]))
+        baba.add_rule(Semantics.Rule(_b, [b, c]))
+        self.assertEqual(set([frozenset([_b]), frozenset([e]), frozenset([a]), frozenset([c]), frozenset([b, c])]),
+                         set(baba.compute_required_to_derive(_b)))
+
+        baba.set_contrary(c, _b)
+        self.assertNotIn(frozenset([b, c]), baba.compute_required_to_derive(_b))
+        self.assertNotIn(Semantics.Attack(b, set([b, c])), baba.attacks[b])
+
+    def test_required_to_derive_cyclic(self):
+        baba = ExampleFrameworks.cyclic_framework()
+        _a, k, s = ExampleFrameworks._a, ExampleFrameworks.k, ExampleFrameworks.s
+        self.assertEqual(set([frozenset([k]), frozenset([j]), frozenset([b])]),
+                         set(baba.compute_required_to_derive(k)))
+        self.assertEqual(set([frozenset([_a]), frozenset([j]), frozenset([k, s]), frozenset([b, s])]),
+                         set(baba.compute_required_to_derive(_a)))
+
+        baba.compute_derivable_dictionary()
+        components = baba.derivation_components(_a)
+        self.assertEqual([set([j, k]), set([_a])], [set(component) for component in components])
+
+        probabilities = Semantics.compute_semantic_probability_tables(baba, [Semantics.GROUNDED])
+        self.assertAlmostEqual(0.7, probabilities[Semantics.GROUNDED]['a'])
+        self.assertAlmostEqual(0.0, probabilities[Semantics.GROUNDED]['b'])
+
+    def test_assumption_bitset(self):
+        bitset = venice_baba.bitset()
+        mask = bitset.mask([a, c, e])
+        self.assertEqual(3, bin(mask).count('1'))
+        self.assertEqual(Semantics.SemanticSet([a, c, e]), bitset.semantic_set(mask))
+        self.assertEqual(bitset.mask([b, d]), bitset.attacked(mask))
+        self.assertTrue(bitset.conflict_free(mask))
+        self.assertFalse(bitset.conflict_free(bitset.mask([c, d])))
+        self.assertEqual(mask, bitset.defended(mask))
+
+    def test_add_and_remove_rule(self):
+        baba = ExampleFrameworks.chain_framework()
+        baba.bitset()
+        baba.add_rule(Semantics.Rule(ExampleFrameworks._d, [a]))
+        self.assertIn(Semantics.Attack(d, {a}), baba.attacks[d])
+        self.assertEqual(Semantics.SemanticSet([]), Semantics.grounded_extension(baba))
+
+        baba.remove_rule(Semantics.Rule(ExampleFrameworks._d, [a]))
+        self.assertNotIn(Semantics.Attack(d, {a}), baba.attacks[d])
+        self.assertEqual(Semantics.SemanticSet([b, d]), Semantics.grounded_extension(baba))
+
+        baba.remove_rule(Semantics.Rule(ExampleFrameworks._c, [d]))
+        self.assertEqual(Semantics.SemanticSet([a, c, d]), Semantics.grounded_extension(baba))
+
+    def test_add_assumption_and_set_contrary(self):
+        baba = ExampleFrameworks.larger_framework()
+        self.assertEqual(Semantics.SemanticSet([e, f, g, h, i]), Semantics.grounded_extension(baba))
+
+        baba.set_contrary(e, j)  # j is a fact
+        self.assertIn(Semantics.Attack(e, set()), baba.attacks[e])
+        self.assertEqual(Semantics.SemanticSet([b, f, g, h, i]), Semantics.grounded_extension(baba))
+
+        baba = ExampleFrameworks.chain_framework()
+        self.assertTrue(Semantics.is_admissible(baba, [b, d]))
+        baba.add_assumption(ExampleFrameworks._d, c)
+        self.assertIn(ExampleFrameworks._d, baba.assumptions)
+        self.assertIn(Semantics.Attack(ExampleFrameworks._d, {c}), baba.attacks[ExampleFrameworks._d])
+        self.assertFalse(Semantics.is_admissible(baba, [b, d]))
+        self.assertEqual(Semantics.SemanticSet([]), Semantics.grounded_extension(baba))
+
+    def test_invalid_framework_changes(self):
+        baba = ExampleFrameworks.chain_framework()
+        self.assertRaises(Semantics.InvalidBABAException, baba.add_rule, Semantics.Rule(a, [b]))
+        self.assertRaises(Semantics.InvalidBABAException, baba.add_rule, Semantics.Rule(ExampleFrameworks._a, [f]))
+        self.assertRaises(Semantics.InvalidBABAException, baba.remove_rule, Semantics.Rule(ExampleFrameworks._a, [c]))
+        self.assertRaises(Semantics.InvalidBABAException, baba.add_assumption, ExampleFrameworks._a)
+        self.assertRaises(Semantics.InvalidBABAException, baba.set_contrary, ExampleFrameworks._a, b)
+        self.assertRaises(Semantics.InvalidBABAException, baba.set_contrary, a, f)
+
+        # Random variables can be neither added as assumptions nor as heads of rules
+        rv = Semantics.Sentence('rv', random_variable=True)
+        baba = Semantics.BABA([a, rv], [], [a], {}, [rv], None)
+        self.assertRaises(Semantics.InvalidBABAException, baba.add_assumption, rv)
+        self.assertRaises(Semantics.InvalidBABAException, baba.add_rule, Semantics.Rule(rv, [a]))
+
+    def test_assumption_bitset_incremental_checks(self):
+        for baba in [venice_baba, larger_baba, s_baba]:
+            bitset = baba.bitset()
+            for mask in range(bitset.all + 1):
+                if not bitset.conflict_free(mask):
+                    continue
+                for index in range(len(bitset.assumptions)):
+                    extended = mask | (1 << index)
+                    self.assertEqual(bitset.conflict_free(extended), bitset.conflict_free_with(mask, index))
+                    self.assertEqual(bitset.attacked(extended), bitset.attacked_with(bitset.attacked(mask), mask, index))
+
+    def test_supporting_attacks(self):
+        compiled = larger_baba.compile()
+        supported_by_e = compiled.supporting_attacks(compiled.ids[e])
+        self.assertEqual(3, len(supported_by_e))
+        self.assertEqual([3, 3, 4], sorted([compiled.support_sizes[attack] for attack in supported_by_e]))
+        self.assertEqual(1, len(compiled.supporting_attacks(compiled.ids[c])))
+        self.assertEqual(0, len(compiled.supporting_attacks(compiled.ids[a])))
+
+    def test_assumption_bitset_follows_random_variable_world(self):
+        baba = ExampleFrameworks.cow_framework()
+        self.assertTrue(Semantics.is_admissible(baba, [ExampleFrameworks.not_FM]))
+
+        baba.set_random_variable_world([ExampleFrameworks.CM])
+        self.assertFalse(Semantics.conflict_free(baba, [ExampleFrameworks.not_FM]))
+        self.assertFalse(Semantics.is_admissible(baba, [ExampleFrameworks.not_FM]))
 
     def test_admissible_simple_framework(self):
         baba = ExampleFrameworks.valid_BABA_framework()
@@ -366,6 +522,19 @@ class TestSemantics(unittest.TestCase):
         admissible_sets = Semantics.admissible(s_baba)
         self.assertEqual(18, len(admissible_sets))
 
+    def test_generate_admissible_matches_powerset_filtering(self):
+        for baba in reference_babas:
+            expected = set([Semantics.SemanticSet(candidate) for candidate in SemanticsUtils.powerset(baba.assumptions)
+                            if Semantics.is_admissible(baba, candidate)])
+            self.assertEqual(expected, Semantics.admissible(baba))
+
+    # Candidates that can no longer be defended are pruned (a 30 assumption chain has only 16 admissible sets)
+    def test_generate_admissible_long_attack_chain(self):
+        baba = ExampleFrameworks.attack_chain_framework(30)
+        admissible_sets = list(Semantics.iter_admissible(baba, timeout=10))
+        self.assertEqual(16, len(admissible_sets))
+        self.assertIn(Semantics.grounded_extension(baba), admissible_sets)
+
     def test_preferred_larger_framework(self):
         baba = ExampleFrameworks.larger_framework()
         preferred_sets = Semantics.preferred(baba)
@@ -384,6 +553,19 @@ class TestSemantics(unittest.TestCase):
         self.assertIn(Semantics.SemanticSet([a, c, e, f]), preferred_sets)
         self.assertEqual(3, len(preferred_sets))
 
+    def test_preferred_search_matches_maximal_admissible_sets(self):
+        for baba in reference_babas:
+            admissible_sets = Semantics.admissible(baba)
+            self.assertEqual(set(Semantics.preferred(baba, admissibles=admissible_sets)), set(Semantics.preferred(baba)))
+            self.assertEqual(len(Semantics.preferred(baba, admissibles=admissible_sets)), len(Semantics.preferred(baba)))
+
+    # The unique preferred set of an attack chain is labelled by propagation, without branching
+    def test_preferred_long_attack_chain(self):
+        baba = ExampleFrameworks.attack_chain_framework(300)
+        preferred_sets = list(Semantics.iter_preferred(baba, timeout=10))
+        self.assertEqual([Semantics.grounded_extension(baba)], preferred_sets)
+        self.assertEqual(150, len(preferred_sets[0].elements))
+
     def test_complete_venice_framework(self):
         complete_sets = Semantics.complete(venice_baba)
         self.assertIn(Semantics.SemanticSet([]), complete_sets)
@@ -401,6 +583,13 @@ class TestSemantics(unittest.TestCase):
         self.assertIn(Semantics.SemanticSet([b, f]), complete_sets)
         self.assertEqual(6, len(complete_sets))
 
+    def test_complete_labelling_matches_admissible_filtering(self):
+        for baba in reference_babas + [ExampleFrameworks.odd_cycle_framework()]:
+            admissible_sets = Semantics.admissible(baba)
+            complete_sets = Semantics.complete(baba)
+            self.assertEqual(set(Semantics.complete(baba, admissibles=admissible_sets)), set(complete_sets))
+            self.assertEqual(len(set(complete_sets)), len(complete_sets))
+
     def test_grounded_venice_framework(self):
         grounded_sets = Semantics.grounded(venice_baba)
         self.assertIn(Semantics.SemanticSet([]), grounded_sets)
@@ -411,6 +600,15 @@ class TestSemantics(unittest.TestCase):
         self.assertIn(Semantics.SemanticSet([f]), grounded_sets)
         self.assertEqual(1, len(grounded_sets))
 
+    def test_grounded_extension_chain_framework(self):
+        grounded_extension = Semantics.grounded_extension(ExampleFrameworks.chain_framework())
+        self.assertEqual(Semantics.SemanticSet([b, d]), grounded_extension)
+
+    def test_grounded_extension_matches_minimal_complete_set(self):
+        for baba in reference_babas:
+            minimal_complete = SemanticsUtils.minimal_set(Semantics.complete(baba))
+            self.assertEqual(minimal_complete, [Semantics.grounded_extension(baba)])
+
     def test_ideal_venice_framework(self):
         ideal_sets = Semantics.ideal(venice_baba)
         self.assertIn(Semantics.SemanticSet([]), ideal_sets)
@@ -421,6 +619,22 @@ class TestSemantics(unittest.TestCase):
         self.assertIn(Semantics.SemanticSet([f]), ideal_sets)
         self.assertEqual(2, len(ideal_sets))
 
+    def test_ideal_extension(self):
+        self.assertEqual(Semantics.SemanticSet([]), Semantics.ideal_extension(venice_baba))
+        self.assertEqual(Semantics.SemanticSet([f]), Semantics.ideal_extension(s_baba))
+        self.assertEqual(Semantics.SemanticSet([]), Semantics.ideal_extension(ExampleFrameworks.ideal_framework()))
+
+    def test_ideal_extension_is_largest_ideal_set(self):
+        for baba in reference_babas:
+            ideal_sets = Semantics.ideal(baba)
+            ideal_extension = Semantics.ideal_extension(baba)
+            self.assertIn(ideal_extension, ideal_sets)
+            self.assertTrue(all(ideal_set.elements.issubset(ideal_extension.elements) for ideal_set in ideal_sets))
+
+    def test_ideal_searched_within_ideal_extension(self):
+        for baba in reference_babas:
+            self.assertEqual(set(Semantics.ideal(baba, Semantics.admissible(baba))), set(Semantics.ideal(baba)))
+
     def test_stable_venice_framework(self):
         stable_sets = Semantics.stable(venice_baba)
         self.assertIn(Semantics.SemanticSet([a, c, e]), stable_sets)
@@ -434,6 +648,32 @@ class TestSemantics(unittest.TestCase):
         self.assertIn(Semantics.SemanticSet([b, e, f]), stable_sets)
         self.assertEqual(3, len(stable_sets))
 
+    def test_stable_search_matches_admissible_filtering(self):
+        for baba in reference_babas:
+            admissible_sets = Semantics.admissible(baba)
+            self.assertEqual(set(Semantics.stable(baba, admissibles=admissible_sets)), set(Semantics.stable(baba)))
+
+    # Outside assumptions that share a contrary are all attacked once it is derived
+    def test_stable_with_shared_contrary(self):
+        a0, a1, a2, a3, a4 = [Semantics.Sentence('a' + str(index)) for index in range(5)]
+        _a3 = Semantics.Sentence('_a3')
+        contraries = {a2: Semantics.Contrary(a2, a3), a4: Semantics.Contrary(a4, a3), a3: Semantics.Contrary(a3, _a3)}
+        baba = Semantics.BABA([a0, a1, a2, a3, a4, _a3], [Semantics.Rule(_a3, [a2])], [a0, a1, a2, a3, a4],
+                              contraries, [], None)
+
+        expected = set([Semantics.SemanticSet([a0, a1, a3]), Semantics.SemanticSet([a0, a1, a2, a4])])
+        self.assertEqual(expected, set(Semantics.stable(baba, admissibles=Semantics.admissible(baba))))
+        self.assertEqual(expected, set(Semantics.stable(baba)))
+
+    def test_stable_first_only(self):
+        stable_sets = Semantics.stable(s_baba, first_only=True)
+        self.assertEqual(1, len(stable_sets))
+        self.assertIn(stable_sets[0], Semantics.stable(s_baba))
+
+    def test_has_stable_set(self):
+        self.assertTrue(Semantics.has_stable_set(venice_baba))
+        self.assertFalse(Semantics.has_stable_set(ExampleFrameworks.odd_cycle_framework()))
+
     def test_sceptically_preferred_venice_framework(self): #?
         sceptically_preferred_sets = Semantics.sceptically_preferred(venice_baba)
         self.assertEqual(1, len(sceptically_preferred_sets))
@@ -452,6 +692,59 @@ class TestSemantics(unittest.TestCase):
         self.assertIn(Semantics.SemanticSet([]), ideal_sets)
         self.assertEqual(1, len(ideal_sets))
 
+    def test_iterators_yield_the_extensions(self):
+        self.assertEqual(Semantics.admissible(s_baba), set(Semantics.iter_admissible(s_baba)))
+        self.assertEqual(set(Semantics.complete(s_baba)), set(Semantics.iter_complete(s_baba)))
+        self.assertEqual(set(Semantics.preferred(s_baba)), set(Semantics.iter_preferred(s_baba)))
+        self.assertEqual(set(Semantics.stable(s_baba)), set(Semantics.iter_stable(s_baba)))
+
+    def test_iterators_with_limit(self):
+        self.assertEqual(5, len(list(Semantics.iter_admissible(s_baba, limit=5))))
+        self.assertEqual(2, len(list(Semantics.iter_preferred(s_baba, limit=2))))
+        self.assertEqual(3, len(list(Semantics.iter_stable(s_baba, limit=10))))
+        self.assertEqual(0, len(list(Semantics.iter_complete(s_baba, limit=0))))
+
+    def test_iterators_with_timeout(self):
+        self.assertEqual(0, len(list(Semantics.iter_admissible(s_baba, timeout=-1))))
+        self.assertEqual(18, len(list(Semantics.iter_admissible(s_baba, timeout=60))))
+
+    def test_acceptance_venice_framework(self):
+        self.assertFalse(Semantics.accepted_grounded(venice_baba, [a]))
+        self.assertTrue(Semantics.credulously_accepted_preferred(venice_baba, [a]))
+        self.assertTrue(Semantics.credulously_accepted_preferred(venice_baba, [a, ExampleFrameworks._b]))
+        self.assertFalse(Semantics.credulously_accepted_preferred(venice_baba, [a, b]))
+        self.assertFalse(Semantics.sceptically_accepted_preferred(venice_baba, [a]))
+        self.assertTrue(Semantics.credulously_accepted_stable(venice_baba, [b, d]))
+        self.assertFalse(Semantics.sceptically_accepted_stable(venice_baba, [b]))
+        self.assertTrue(Semantics.credulously_accepted_complete(venice_baba, [e]))
+        self.assertFalse(Semantics.sceptically_accepted_complete(venice_baba, [e]))
+
+    def test_acceptance_s_framework(self):
+        self.assertTrue(Semantics.accepted_grounded(s_baba, [f]))
+        self.assertTrue(Semantics.sceptically_accepted_preferred(s_baba, [f]))
+        self.assertTrue(Semantics.sceptically_accepted_stable(s_baba, [f]))
+        self.assertTrue(Semantics.sceptically_accepted_complete(s_baba, [f]))
+        self.assertFalse(Semantics.sceptically_accepted_preferred(s_baba, [e]))
+        self.assertTrue(Semantics.credulously_accepted_stable(s_baba, [e]))
+
+    # [b] is preferred but not complete: it defends a (which cannot be attacked), but a attacks b
+    def test_credulous_complete_acceptance_of_preferred_set_that_is_not_complete(self):
+        _b = ExampleFrameworks._b
+        baba = Semantics.BABA([a, b, _b], [Semantics.Rule(_b, [a])], [a, b], {b: Semantics.Contrary(b, _b)}, [], None)
+        self.assertEqual(set([Semantics.SemanticSet([a]), Semantics.SemanticSet([b])]), set(Semantics.preferred(baba)))
+        self.assertEqual([Semantics.SemanticSet([a])], Semantics.complete(baba))
+        self.assertTrue(Semantics.credulously_accepted_preferred(baba, [b]))
+        self.assertFalse(Semantics.credulously_accepted_complete(baba, [b]))
+        self.assertTrue(Semantics.credulously_accepted_complete(baba, [a, _b]))
+
+    def test_acceptance_without_stable_sets(self):
+        baba = ExampleFrameworks.odd_cycle_framework()
+        self.assertFalse(Semantics.credulously_accepted_stable(baba, []))
+        self.assertTrue(Semantics.sceptically_accepted_stable(baba, [a]))
+
+    def test_acceptance_of_invalid_sentences(self):
+        self.assertRaises(Semantics.InvalidBABAException, Semantics.accepted_grounded, venice_baba, [f])
+
 #############################################################
 # BABA semantics testing (with random variables)
 
@@ -523,6 +816,25 @@ class TestSemantics(unittest.TestCase):
         self.assertAlmostEqual(0.02, baba.BN.p_world([ExampleFrameworks.cond_JN, ExampleFrameworks.JF, ExampleFrameworks.CM]))
         self.assertAlmostEqual(0.72, Semantics.semantic_probability(Semantics.GROUNDED, baba, [ExampleFrameworks.HP]))
 
+    # Attacks whose random variables hold in the world make a set conflicting
+    def test_cow_framework_sceptically_preferred_and_ideal_probabilities(self):
+        for semantics in [Semantics.SCEPTICALLY_PREFERRED, Semantics.IDEAL]:
+            probabilities = Semantics.compute_semantic_probability(semantics, ExampleFrameworks.cow_framework())
+            self.assertAlmostEqual(0.18, probabilities[ExampleFrameworks.HP.symbol])
+            self.assertAlmostEqual(0.82, probabilities[ExampleFrameworks.not_HP.symbol])
+            self.assertAlmostEqual(0.2, probabilities[ExampleFrameworks.CCA.symbol])
+            self.assertAlmostEqual(0.8, probabilities[ExampleFrameworks.not_CCA.symbol])
+            self.assertAlmostEqual(0.9, probabilities[ExampleFrameworks.not_FM.symbol])
+            self.assertAlmostEqual(0.2, probabilities['not_JN'])
+
+            probabilities = Semantics.compute_semantic_probability(semantics,
+                                                                   ExampleFrameworks.conditional_cow_framework())
+            self.assertAlmostEqual(0.72, probabilities[ExampleFrameworks.HP.symbol])
+            self.assertAlmostEqual(0.28, probabilities[ExampleFrameworks.not_HP.symbol])
+            self.assertAlmostEqual(0.8, probabilities[ExampleFrameworks.CCA.symbol])
+            self.assertAlmostEqual(0.2, probabilities[ExampleFrameworks.not_CCA.symbol])
+            self.assertAlmostEqual(0.9, probabilities[ExampleFrameworks.not_FM.symbol])
+
     def test_compute_grounded_probability(self):
         baba = ExampleFrameworks.r_framework()
         grounded_probabilities = Semantics.compute_semantic_probability(Semantics.GROUNDED, baba)
@@ -546,6 +858,136 @@ class TestSemantics(unittest.TestCase):
         self.assertAlmostEqual(0.6, ideal_probabilities[ExampleFrameworks.s.symbol])
         self.assertAlmostEqual(0.4, ideal_probabilities[ExampleFrameworks.t.symbol])
 
+    def test_world_random_variables(self):
+        baba = ExampleFrameworks.informational_r_framework()
+        self.assertEqual({'s', 't'}, Semantics.relevant_random_variables(baba, [ExampleFrameworks.a]))
+        self.assertEqual({'s', 't', 'v'}, Semantics.relevant_random_variables(baba, [ExampleFrameworks.v]))
+        self.assertEqual([ExampleFrameworks.s, ExampleFrameworks.t, ExampleFrameworks.w],
+                         Semantics.world_random_variables(baba, [ExampleFrameworks.a]))
+
+    def test_informational_random_variables_marginalise_out(self):
+        baba = ExampleFrameworks.informational_r_framework()
+        self.assertAlmostEqual(0.41 + 0.59 * 0.4,
+                               Semantics.semantic_probability(Semantics.GROUNDED, baba, [ExampleFrameworks.a]))
+        self.assertAlmostEqual(0.4, Semantics.semantic_probability(Semantics.GROUNDED, baba, [ExampleFrameworks.v]))
+
+        grounded_probabilities = Semantics.compute_semantic_probability(Semantics.GROUNDED, baba)
+        self.assertAlmostEqual(0.41, grounded_probabilities[ExampleFrameworks.t.symbol])
+        self.assertAlmostEqual(0.5, grounded_probabilities[ExampleFrameworks.u.symbol])
+        self.assertAlmostEqual(0.4, grounded_probabilities[ExampleFrameworks.v.symbol])
+        self.assertAlmostEqual(0.3, grounded_probabilities[ExampleFrameworks.w.symbol])
+        self.assertAlmostEqual(0.59, grounded_probabilities[ExampleFrameworks.b.symbol])
+        self.assertEqual(1.0, grounded_probabilities[ExampleFrameworks.c.symbol])
+
+    def test_estimate_semantic_probability(self):
+        exact = Semantics.compute_semantic_probability(Semantics.GROUNDED, ExampleFrameworks.conditional_cow_framework())
+        estimates = Semantics.estimate_semantic_probability(
+            Semantics.GROUNDED, ExampleFrameworks.conditional_cow_framework(), precision=0.01, seed=3)
+        self.assertEqual(exact.keys(), estimates.keys())
+        for symbol, (estimate, error) in estimates.items():
+            self.assertLessEqual(error, 0.01)
+            self.assertLessEqual(abs(exact[symbol] - estimate), 5 * error + 1e-12)
+
+        again = Semantics.estimate_semantic_probability(
+            Semantics.GROUNDED, ExampleFrameworks.conditional_cow_framework(), precision=0.01, seed=3)
+        self.assertEqual(estimates, again)
+
+    def test_estimate_semantic_probability_sample_budget(self):
+        baba = ExampleFrameworks.informational_r_framework()
+        estimates = Semantics.estimate_semantic_probability(
+            Semantics.GROUNDED, baba, precision=0.0, max_samples=50, batch_size=20, seed=1)
+        self.assertGreater(estimates[ExampleFrameworks.a.symbol][1], 0.0)
+        self.assertEqual((1.0, 0.0), estimates[ExampleFrameworks.c.symbol])
+        self.assertAlmostEqual(0.4, estimates[ExampleFrameworks.v.symbol][0])
+        self.assertEqual(0.0, estimates[ExampleFrameworks.v.symbol][1])
+
+        self.assertRaises(Semantics.InvalidSemanticsException, Semantics.estimate_semantic_probability, -1, baba)
+
+    def test_compute_parallel_semantic_probability(self):
+        for framework in [ExampleFrameworks.conditional_cow_framework, ExampleFrameworks.informational_r_framework,
+                          ExampleFrameworks.ideal_framework]:
+            expected = Semantics.compute_semantic_probability(Semantics.IDEAL, framework())
+            for processes in [1, 3]:
+                probabilities = Semantics.compute_parallel_semantic_probability(Semantics.IDEAL, framework(), processes)
+                self.assertEqual(expected.keys(), probabilities.keys())
+                for symbol, probability in expected.items():
+                    self.assertAlmostEqual(probability, probabilities[symbol])
+
+    def test_acceptance_cache(self):
+        baba = ExampleFrameworks.derivation_framework()
+        cache = Semantics.AcceptanceCache(baba, [Semantics.GROUNDED], [a, j])
+        worlds = SemanticsUtils.generate_worlds([ExampleFrameworks.s, ExampleFrameworks.t])
+        accepted = [cache.accepted(world)[Semantics.GROUNDED] for world in worlds]
+        self.assertEqual([[], [], [a, j], [a]], accepted)
+        self.assertEqual(2, len(cache.extensions))
+        self.assertEqual(4, len(cache.accepted_sentences))
+
+        self.assertAlmostEqual(0.4 * 0.4, Semantics.semantic_probability(Semantics.GROUNDED, baba, [j]))
+        probabilities = Semantics.compute_semantic_probability(Semantics.GROUNDED, baba)
+        self.assertAlmostEqual(0.4, probabilities[a.symbol])
+        self.assertAlmostEqual(0.16, probabilities[j.symbol])
+
+    def test_gray_code_worlds(self):
+        for baba in [ExampleFrameworks.conditional_cow_framework(), ExampleFrameworks.informational_r_framework()]:
+            table = Semantics.world_table(baba, Semantics.world_random_variables(baba, baba.language))
+            visited = []
+            previous = None
+            for index, world in Semantics.gray_code_worlds(baba, table):
+                self.assertEqual(table.world(index), world)
+                self.assertEqual(Semantics.AssumptionBitset(baba).attacks, baba.bitset().attacks)
+                self.assertEqual(Semantics.AssumptionBitset(baba).valid, baba.bitset().valid)
+                if previous is not None:
+                    self.assertEqual(1, len([rv for rv in world if rv not in previous]))
+                visited.append(index)
+                previous = world
+            self.assertEqual(list(range(len(table))), sorted(visited))
+
+    def test_iter_semantic_probability_bounds(self):
+        exact = Semantics.compute_semantic_probability(Semantics.GROUNDED, ExampleFrameworks.informational_r_framework())
+        baba = ExampleFrameworks.informational_r_framework()
+        all_bounds = list(Semantics.iter_semantic_probability_bounds(Semantics.GROUNDED, baba, batch_size=1))
+        self.assertEqual(8, len(all_bounds))
+        for bounds in all_bounds:
+            for symbol, (lower, upper) in bounds.items():
+                self.assertLessEqual(lower, exact[symbol] + 1e-12)
+                self.assertGreaterEqual(upper, exact[symbol] - 1e-12)
+        for symbol, (lower, upper) in all_bounds[-1].items():
+            self.assertAlmostEqual(exact[symbol], lower)
+            self.assertEqual(lower, upper)
+
+        early_bounds = list(Semantics.iter_semantic_probability_bounds(Semantics.GROUNDED, baba, epsilon=0.5))
+        self.assertEqual(1, len(early_bounds))
+        self.assertTrue(all(0.0 < upper - lower <= 0.5 for symbol, (lower, upper) in early_bounds[0].items()
+                            if symbol not in ['u', 'v']))
+
+    def test_semantic_probabilities(self):
+        queries = [[ExampleFrameworks.j], [ExampleFrameworks.b], [ExampleFrameworks.a, ExampleFrameworks.b],
+                   [ExampleFrameworks.c], [ExampleFrameworks.v], []]
+        probabilities = Semantics.semantic_probabilities(
+            Semantics.GROUNDED, ExampleFrameworks.informational_r_framework(), queries)
+        for query, probability in zip(queries, probabilities):
+            self.assertAlmostEqual(Semantics.semantic_probability(
+                Semantics.GROUNDED, ExampleFrameworks.informational_r_framework(), query), probability)
+        self.assertAlmostEqual(0.59 * 0.4, probabilities[2])
+        self.assertAlmostEqual(1.0, probabilities[5])
+
+        self.assertRaises(Semantics.InvalidBABAException, Semantics.semantic_probabilities, Semantics.GROUNDED,
+                          ExampleFrameworks.r_framework(), [[ExampleFrameworks.a], [ExampleFrameworks.HP]])
+
+    def test_compute_semantic_probability_tables(self):
+        baba = ExampleFrameworks.conditional_cow_framework()
+        tables = Semantics.compute_semantic_probability_tables(
+            baba, [Semantics.GROUNDED, Semantics.SCEPTICALLY_PREFERRED, Semantics.IDEAL])
+        for semantics in [Semantics.GROUNDED, Semantics.SCEPTICALLY_PREFERRED, Semantics.IDEAL]:
+            expected = Semantics.compute_semantic_probability(semantics, ExampleFrameworks.conditional_cow_framework())
+            self.assertEqual(expected.keys(), tables[semantics].keys())
+            for symbol, probability in expected.items():
+                self.assertAlmostEqual(probability, tables[semantics][symbol])
+        self.assertAlmostEqual(0.72, tables[Semantics.GROUNDED][ExampleFrameworks.HP.symbol])
+
+        self.assertRaises(Semantics.InvalidSemanticsException,
+                          Semantics.compute_semantic_probability_tables, baba, [Semantics.GROUNDED, -1])
+
     def test_compute_semantic_probabilities(self):
         g, s, i = Semantics.compute_semantic_probabilities(ExampleFrameworks.r_framework())
         self.assertEqual(g, [('_a', '0.360'), ('_b', '0.400'), ('_c', '0.000'), ('a', '0.640'),
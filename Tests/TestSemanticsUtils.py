@@ -133,6 +133,23 @@ class TestSemantics(unittest.TestCase):
         eight_worlds = Utils.generate_worlds([a, b, c])
         self.assertEqual(8, len(eight_worlds))
 
+    def test_minimal_supports(self):
+        supports = [frozenset([a, b]), frozenset([a]), frozenset([b, c]), frozenset([a]), frozenset([c])]
+        self.assertEqual([frozenset([a]), frozenset([c])], Utils.minimal_supports(supports))
+
+        counterable = lambda support: b in support
+        self.assertEqual([frozenset([a]), frozenset([c]), frozenset([a, b]), frozenset([b, c])],
+                         Utils.minimal_supports(supports, counterable))
+
+    def test_world_from_index(self):
+        a = Semantics.Sentence('a', random_variable=True)
+        b = Semantics.Sentence('b', random_variable=True)
+        c = Semantics.Sentence('c', random_variable=True)
+
+        eight_worlds = Utils.generate_worlds([a, b, c])
+        self.assertEqual(eight_worlds, [Utils.world_from_index([a, b, c], index) for index in range(8)])
+        self.assertEqual([], Utils.world_from_index([], 0))
+
     def test_extensions_and_derivations_to_str_list(self):
         ext_deriv = [(Semantics.SemanticSet([a, b, c]), [d, e, f]),
                      (Semantics.SemanticSet([d, e, f]), [a, b, c])]